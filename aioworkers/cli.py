@@ -1,5 +1,6 @@
 import argparse
 import asyncio
+import contextlib
 import logging.config
 import multiprocessing.connection
 import operator
@@ -18,6 +19,7 @@ from .core import command, formatter
 from .core.config import Config
 from .core.context import Context, GroupResolver
 from .core.plugin import Plugin, search_plugins
+from .core.profile import StartupProfiler
 
 parser = argparse.ArgumentParser(prefix_chars='-+')
 
@@ -54,6 +56,8 @@ parser.add_argument('-I', '--interact-kernel', action='store_true')
 parser.add_argument('-l', '--logging', help='logging level')
 parser.add_argument('--shutdown-timeout', type=float, default=60)
 parser.add_argument("--version", action="version", version=__version__)
+parser.add_argument('--profile-startup', action='store_true', help='Print timing of startup')
+parser.add_argument('--profile-trace', metavar='PATH', help='Write Chrome trace JSON of startup to PATH')
 
 
 PROMPT = """======== Running aioworkers ========
@@ -106,6 +110,12 @@ def main(
     assert args, "Namespace is None"
     if args.logging:
         logging.basicConfig(level=args.logging.upper())
+    profiler = None
+    if args.profile_startup or args.profile_trace:
+        profiler = StartupProfiler(trace=args.profile_trace)
+
+    def phase(name: str):
+        return profiler.phase(name) if profiler else contextlib.nullcontext()
 
     if need_help:
         argv.append("--help")
@@ -124,8 +134,9 @@ def main(
         else:
             commands += (p.name,)
 
-    plugins = search_plugins()
-    plugins.extend(search_plugins(*commands, force=True))
+    with phase('plugins'):
+        plugins = search_plugins()
+        plugins.extend(search_plugins(*commands, force=True))
     for i in plugins:
         i.add_arguments(parser)
 
@@ -139,17 +150,21 @@ def main(
     if getattr(args, "config_stdin", None):
         assert not args.interact, "Can not be used --config-stdin with --interact"
         config_dict = utils.load_from_fd(sys.stdin.buffer)
+    elif getattr(args, "config_snapshot", None):
+        config_dict = utils.load_from_path(args.config_snapshot)
 
     config = context.config
-    plugins.extend(search_plugins(*cmds))
-    for plgn in plugins:
-        args, argv = plgn.parse_known_args(args=argv, namespace=args)
-        config.load(*plgn.configs)
-        config.update(plgn.get_config())
-    cmds = [cmd for cmd in cmds if cmd not in sys.modules]
-
-    config.load(*config_files)
-    config_dict and config.update(config_dict)
+    with phase('plugins'):
+        plugins.extend(search_plugins(*cmds))
+    with phase('config'):
+        for plgn in plugins:
+            args, argv = plgn.parse_known_args(args=argv, namespace=args)
+            config.load(*plgn.configs)
+            config.update(plgn.get_config())
+        cmds = [cmd for cmd in cmds if cmd not in sys.modules]
+
+        config.load(*config_files)
+        config_dict and config.update(config_dict)
 
     def sum_g(list_groups):
         if list_groups:
@@ -180,6 +195,7 @@ def main(
         argv=argv,
         ns=args,
         prompt=PROMPT,
+        profiler=profiler,
     )
 
     try:
@@ -284,6 +300,7 @@ def loop_run(
     loop: Optional[asyncio.AbstractEventLoop] = None,
     prompt: Optional[str] = None,
     process_name: Optional[str] = None,
+    profiler: Optional[StartupProfiler] = None,
 ):
     if process_name:
         utils.setproctitle(process_name)
@@ -319,8 +336,14 @@ def loop_run(
             await loop.shutdown_asyncgens()
         loop.stop()
 
+    if profiler is not None:
+        profiler.attach()
+    started = time.perf_counter()
+
     results: Dict = {}
     with utils.monkey_close(loop), context:
+        if profiler is not None:
+            report_startup(profiler, started)
         loop.add_signal_handler(signal.SIGTERM, lambda *args: context.loop.create_task(shutdown()))
         if future is not None:
             future.set_result(context)
@@ -350,6 +373,18 @@ def loop_run(
             print(file=sys.stderr)
 
 
+def report_startup(profiler: StartupProfiler, started: float):
+    profiler.record('', 'context', started, time.perf_counter() - started)
+    build_timing = getattr(context.processors, 'build_timing', None)
+    if build_timing is not None:
+        profiler.collect(build_timing())
+    profiler.detach()
+    print(profiler.table(), file=sys.stderr)
+    if profiler.trace:
+        with open(profiler.trace, 'w') as f:
+            profiler.dump(f)
+
+
 class UriType(argparse.FileType):
     def __call__(self, string):
         if urlparse(string).scheme not in {"http", "https"}:
@@ -368,6 +403,7 @@ class plugin(Plugin):
             type=UriType("r", encoding="utf-8"),
         )
         parser.add_argument("--config-stdin", action="store_true")
+        parser.add_argument("--config-snapshot", help="Path to pickled config")
         parser.add_argument("--formatter")
         parser.add_argument("--output", type=argparse.FileType("wb"))
 
@@ -3,6 +3,7 @@ import io
 import logging
 import mimetypes
 import os
+import pickle
 import re
 from abc import abstractmethod
 from collections import ChainMap, OrderedDict, abc
@@ -558,6 +559,7 @@ class Config(ValueExtractor):
                 i = Path(i)
             self.search_dirs.append(i)
         self.uris = []
+        self._cache: Dict[str, Any] = {}
         super().__init__(MergeDict())
         self.update(kwargs)
 
@@ -639,6 +641,7 @@ class Config(ValueExtractor):
         return {k: os.environ[name] for k, name in self._env.items() if name in os.environ}
 
     def _update(self, conf: MergeDict, data: dict) -> None:
+        self._cache.clear()
         self._update_logging(data)
         env_map = self._from_env(data)
         conf(data)
@@ -687,6 +690,13 @@ class Config(ValueExtractor):
             assert isinstance(self._val, MergeDict)
             self._update(self._val, d)
 
+    def snapshot(self) -> bytes:
+        """Pickled config, cached until next load or update"""
+        data = self._cache.get('snapshot')
+        if data is None:
+            data = self._cache['snapshot'] = pickle.dumps(self)
+        return data
+
     def load_plugins(self, *modules, force=True):
         from . import plugin
 
@@ -3,12 +3,14 @@ import contextlib
 import inspect
 import logging.config
 import os
+import time
 from collections import OrderedDict
 from functools import wraps
 from typing import (
     Any,
     Awaitable,
     Callable,
+    Dict,
     FrozenSet,
     Iterable,
     Iterator,
@@ -25,7 +27,7 @@ from typing import (
 )
 
 from ..utils import import_name
-from .base import AbstractEntity, NameLogger
+from .base import AbstractEntity, Link, NameLogger
 from .config import ValueExtractor
 
 T = TypeVar('T')
@@ -144,6 +146,7 @@ class Signal:
     def __init__(self, context: 'Context', name: Optional[str] = None):
         self._counter = 0
         self._signals = []  # type: List
+        self.timing: Dict[str, float] = {}
         self._context = context
         self._name = name or str(id(self))
         logger_name = "aioworkers.signals"
@@ -173,6 +176,7 @@ class Signal:
             self._logger.info(self.LOG_RUN, name)
         if timeout:
             awaitable = asyncio.wait_for(awaitable, timeout=timeout)
+        started = time.perf_counter()
         try:
             await awaitable
         except asyncio.TimeoutError as e:
@@ -203,10 +207,13 @@ class Signal:
                 len(self._signals),
                 name,
             )
+        finally:
+            self.timing[name] = self.timing.get(name, 0.0) + time.perf_counter() - started
 
     def _run_sync(self, name: str, func: Callable) -> Optional[Awaitable]:
         params = inspect.signature(func).parameters
         self._logger.info(self.LOG_RUN, name)
+        started = time.perf_counter()
         try:
             if 'context' in params:
                 result = func(self._context)
@@ -222,6 +229,8 @@ class Signal:
                 e,
             )
             raise
+        finally:
+            self.timing[name] = self.timing.get(name, 0.0) + time.perf_counter() - started
         if isinstance(result, Awaitable):
             return result
         else:
@@ -241,6 +250,7 @@ class Signal:
         coroutine: bool = True,
     ) -> List[Awaitable]:
         self._counter = 0
+        self.timing = {}
         errors = []
         coros = []  # type: List
         for i, g in self._signals:
@@ -375,9 +385,14 @@ class EntityContextProcessor(ContextProcessor):
 
     def __init__(self, context: 'Context', path: str, value: ValueExtractor):
         super().__init__(context, path, value)
+        self.timing: Dict[str, Tuple[float, float]] = {}
+        started = time.perf_counter()
         cls = import_name(value[self.key])
+        self._time('import', started)
         if issubclass(cls, AbstractEntity):
+            started = time.perf_counter()
             entity = cls(None)
+            self._time('__init__', started)
         else:
             try:
                 signature = inspect.signature(cls)
@@ -386,10 +401,17 @@ class EntityContextProcessor(ContextProcessor):
                 raise TypeError(f"Error while creating entity on {path} from {value[self.key]}: {e}") from e
             except ValueError as e:
                 raise ValueError(f"Error while checking entity on {path} from {value[self.key]}: {e}") from e
+            started = time.perf_counter()
             entity = cls(value, context=context, loop=context.loop)
+            self._time('__init__', started)
+        started = time.perf_counter()
         context[path] = entity
+        self._time('set_config', started)
         self.entity = entity
 
+    def _time(self, phase: str, started: float):
+        self.timing[phase] = started, time.perf_counter() - started
+
     @classmethod
     def match(
         cls,
@@ -475,6 +497,9 @@ class RootContextProcessor(ContextProcessor):
         self._built = False
         self.on_ready = Signal(context, name='ready')
         self._processors = OrderedDict((i.key, i) for i in self.processors)
+        self._entities: Dict[str, EntityContextProcessor] = {}
+        self.waves: List[List[str]] = []
+        self.timing: Dict[str, float] = {}
 
     def __iter__(self) -> Iterator[Type[ContextProcessor]]:
         yield from self._processors.values()
@@ -493,6 +518,8 @@ class RootContextProcessor(ContextProcessor):
                     if isinstance(v, Mapping):
                         groups = v.get('groups') or groups
                     self.on_ready.append(m.process, groups)
+                    if isinstance(m, EntityContextProcessor):
+                        self._entities[p] = m
                 break
             else:
                 if isinstance(v, Mapping):
@@ -506,9 +533,86 @@ class RootContextProcessor(ContextProcessor):
             self.processing(self.value)
             self._built = True
 
+    def build_timing(self) -> Dict[str, Dict[str, Tuple[float, float]]]:
+        """Start and seconds of import, __init__ and set_config of entities"""
+        return {path: getattr(m, 'timing', {}) for path, m in self._entities.items()}
+
+    def _resolve(self, ref: Any, path: str) -> Optional[str]:
+        if not isinstance(ref, str) or not ref.startswith(DOT):
+            return None
+        parts = ref[1:].split(DOT)
+        while parts:
+            target = DOT.join(parts)
+            if target in self._entities:
+                return None if target == path else target
+            parts.pop()
+        return None
+
+    def _references(self, value: Any) -> Iterator[Any]:
+        if isinstance(value, Mapping):
+            for v in value.values():
+                yield from self._references(v)
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                yield from self._references(v)
+        else:
+            yield value
+
+    def dependencies(self) -> Dict[str, Set[str]]:
+        """Entities referenced by links and config of each entity"""
+        result = {}
+        for path, m in self._entities.items():
+            deps = {d for d in (self._resolve(r, path) for r in self._references(m.value)) if d}
+            for klass in type(getattr(m, 'entity', None)).__mro__:
+                for name, attr in vars(klass).items():
+                    ref = isinstance(attr, Link) and m.value.get(name)
+                    if isinstance(ref, str) and not ref.startswith(DOT):
+                        ref = DOT + ref
+                    d = self._resolve(ref, path)
+                    if d:
+                        deps.add(d)
+            result[path] = deps
+        return result
+
+    def build_waves(self) -> List[List[str]]:
+        """Topological waves of entities, entities of cycles are in last wave"""
+        deps = self.dependencies()
+        waves = []
+        while deps:
+            wave = [path for path, d in deps.items() if not d]
+            if not wave:
+                self.context.logger.warning('Cycle of dependencies in %s', sorted(deps))
+                waves.append(sorted(deps))
+                break
+            waves.append(wave)
+            for path in wave:
+                del deps[path]
+            for d in deps.values():
+                d.difference_update(wave)
+        return waves
+
     async def process(self, config=None):
         self.build(config)
-        await self.on_ready.send(self.context._group_resolver)
+        self.waves = self.build_waves()
+        processes = {m.process: path for path, m in self._entities.items()}
+        wave_of = {path: i for i, wave in enumerate(self.waves) for path in wave}
+        signals = [Signal(self.context, name='ready') for _ in range(len(self.waves) + 1)]
+        for func, groups in self.on_ready._signals:
+            path = processes.get(func)
+            signals[wave_of[path] if path in wave_of else -1].append(func, groups)
+        signals = [signal for signal in signals if signal._signals]
+        self.timing = {}
+        for i, signal in enumerate(signals, 1):
+            started = time.perf_counter()
+            await signal.send(self.context._group_resolver)
+            self.timing.update(signal.timing)
+            self.context.logger.debug(
+                'Ready wave %s/%s with %s entities in %.3fs',
+                i,
+                len(signals),
+                len(signal._signals),
+                time.perf_counter() - started,
+            )
 
 
 class Context(AbstractEntity, Octopus):
@@ -519,6 +623,8 @@ class Context(AbstractEntity, Octopus):
         self._sent_start = kwargs.pop("sent_start", True)
         self._on_start = Signal(self, name='start')
         self._on_stop = Signal(self, name='stop')
+        self._on_drain = Signal(self, name='drain')
+        self._drain_order = tuple(kwargs.pop('drain_order', ()))
         self._on_disconnect = Signal(self, name='disconnect')
         self._on_cleanup = Signal(self, name='cleanup')
         self.logger = logging.getLogger('aioworkers')
@@ -565,6 +671,10 @@ class Context(AbstractEntity, Octopus):
     def on_stop(self):
         return self._on_stop
 
+    @property
+    def on_drain(self):
+        return self._on_drain
+
     @property
     def on_disconnect(self):
         return self._on_disconnect
@@ -578,6 +688,24 @@ class Context(AbstractEntity, Octopus):
             self.set_loop(asyncio.get_event_loop())
         await self.processors.process(self.config)
 
+    def timing(self) -> Dict[str, Dict[str, float]]:
+        """Seconds spent by each entity in init and in signals of context"""
+        result: Dict[str, Dict[str, float]] = {}
+        signals = [('init', getattr(self.processors, 'timing', {}))]
+        for signal in (
+            self._on_connect,
+            self._on_start,
+            self._on_drain,
+            self._on_stop,
+            self._on_disconnect,
+            self._on_cleanup,
+        ):
+            signals.append((signal._name, signal.timing))
+        for key, timing in signals:
+            for name, seconds in timing.items():
+                result.setdefault(name, {})[key] = seconds
+        return result
+
     async def wait_all(self, coros, raises: bool = False):
         if not coros:
             return
@@ -601,7 +729,20 @@ class Context(AbstractEntity, Octopus):
     async def start(self):
         await self.on_start.send(self._group_resolver)
 
+    async def drain(self, *groups: str):
+        """
+        Drains entities of groups one group after another,
+        entities of other groups are drained together at last
+        """
+        for group in groups:
+            await self.on_drain.send(GroupResolver(include=[group], default=False))
+        await self.on_drain.send(GroupResolver(exclude=groups, all_groups=True))
+
     async def stop(self):
+        order = self._drain_order
+        if not order and self.config:
+            order = tuple(self.config.get('drain_order') or ())
+        await self.drain(*order)
         await self.on_stop.send(self._group_resolver)
 
     async def disconnect(self):
@@ -0,0 +1,129 @@
+import math
+import time
+from typing import Dict, Iterable, Optional
+
+SUB_BUCKETS = 16
+ZERO = -(2**31)
+TICK = 5.0
+ALPHAS = tuple(1 - math.exp(-TICK / 60 / minutes) for minutes in (1, 5, 15))
+
+
+class Histogram:
+    """
+    Histogram of positive values in log-linear buckets,
+    relative error of quantiles is up to 1/SUB_BUCKETS.
+    """
+
+    __slots__ = ('_buckets', 'count', 'sum', 'min', 'max')
+
+    def __init__(self):
+        self._buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value > 0:
+            mantissa, exponent = math.frexp(value)
+            key = exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+        else:
+            key = ZERO
+        self._buckets[key] = self._buckets.get(key, 0) + 1
+
+    @staticmethod
+    def _upper(key: int) -> float:
+        if key == ZERO:
+            return 0.0
+        exponent, sub = divmod(key, SUB_BUCKETS)
+        return math.ldexp(0.5 + (sub + 1) / (2 * SUB_BUCKETS), exponent)
+
+    def quantiles(self, qs: Iterable[float]) -> Dict[float, float]:
+        qs = sorted(qs)
+        result: Dict[float, float] = {}
+        if not self.count:
+            return {q: 0.0 for q in qs}
+        it = iter(qs)
+        q: Optional[float] = next(it, None)
+        seen = 0
+        for key in sorted(self._buckets):
+            seen += self._buckets[key]
+            while q is not None and seen >= q * self.count:
+                result[q] = min(self._upper(key), self.max)
+                q = next(it, None)
+            if q is None:
+                break
+        while q is not None:
+            result[q] = self.max
+            q = next(it, None)
+        return result
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[q]
+
+    def summary(self) -> Dict[str, float]:
+        p50, p95, p99 = self.quantiles((0.5, 0.95, 0.99)).values()
+        return {
+            'count': self.count,
+            'avg': self.sum / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'p50': p50,
+            'p95': p95,
+            'p99': p99,
+        }
+
+
+class Meter:
+    """
+    Count of events with exponentially weighted
+    moving average rates per second over 1, 5 and 15 minutes.
+    """
+
+    __slots__ = ('count', '_uncounted', '_rates', '_last', '_clock', '_started')
+
+    def __init__(self, clock=time.monotonic):
+        self.count = 0
+        self._uncounted = 0
+        self._rates = [0.0, 0.0, 0.0]
+        self._clock = clock
+        self._last = self._started = clock()
+
+    def mark(self, n: int = 1):
+        now = self._clock()
+        if now - self._last >= TICK:
+            self._tick(now)
+        self.count += n
+        self._uncounted += n
+
+    def _tick(self, now: float):
+        ticks = int((now - self._last) // TICK)
+        if not ticks:
+            return
+        self._last += ticks * TICK
+        instant = self._uncounted / TICK
+        self._uncounted = 0
+        rates = self._rates
+        for i, alpha in enumerate(ALPHAS):
+            if rates[i] or instant:
+                rates[i] += alpha * (instant - rates[i])
+                if ticks > 1:
+                    rates[i] *= (1 - alpha) ** (ticks - 1)
+
+    def rates(self) -> Dict[str, float]:
+        now = self._clock()
+        self._tick(now)
+        elapsed = now - self._started
+        return {
+            'count': self.count,
+            'mean': self.count / elapsed if elapsed > 0 else 0.0,
+            'm1': self._rates[0],
+            'm5': self._rates[1],
+            'm15': self._rates[2],
+        }
@@ -0,0 +1,137 @@
+import contextlib
+import json
+import logging
+import os
+import time
+from typing import IO, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from .context import Signal
+
+PHASES = ('import', '__init__', 'set_config', 'init', 'connect', 'start')
+SIGNAL_PHASES = {'ready': 'init', 'connect': 'connect', 'start': 'start'}
+
+
+class SignalHandler(logging.Handler):
+    """Collects start and end of callbacks from logs of signals"""
+
+    def __init__(self, profiler: 'StartupProfiler'):
+        super().__init__(logging.INFO)
+        self._profiler = profiler
+        self._started: Dict[Tuple[str, str], float] = {}
+
+    def emit(self, record: logging.LogRecord):
+        now = time.perf_counter()
+        phase = SIGNAL_PHASES.get(record.name.rsplit('.', 1)[-1])
+        if phase is None or not record.args:
+            return
+        args = record.args if isinstance(record.args, tuple) else (record.args,)
+        msg = str(record.msg)  # prefixed by NameLogger
+        if msg.endswith(Signal.LOG_RUN):
+            self._started[str(args[0]), phase] = now
+        elif msg.endswith((Signal.LOG_END, Signal.LOG_EXC)):
+            name = str(args[2])
+            started = self._started.pop((name, phase), None)
+            if started is not None:
+                self._profiler.record(name, phase, started, now - started)
+
+
+class StartupProfiler:
+    """
+    Wall time of startup phases and of entities in each phase,
+    prints table sorted by total and writes Chrome trace to path of trace.
+    """
+
+    def __init__(self, trace: Optional[str] = None):
+        self.trace = trace
+        self.events: List[Tuple[str, str, float, float]] = []
+        self._origin = time.perf_counter()
+        self._handler = SignalHandler(self)
+        self._logger = logging.getLogger('aioworkers.signals')
+        self._saved: Optional[Tuple[int, bool]] = None
+
+    def record(self, name: str, phase: str, started: float, duration: float):
+        self.events.append((name, phase, started, duration))
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record('', name, started, time.perf_counter() - started)
+
+    def attach(self):
+        """Listens logs of signals until detach"""
+        logger = self._logger
+        self._saved = logger.level, logger.propagate
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(self._handler)
+
+    def detach(self):
+        if self._saved is None:
+            return
+        self._logger.removeHandler(self._handler)
+        self._logger.level, self._logger.propagate = self._saved
+        self._saved = None
+
+    def collect(self, timing: Mapping[str, Mapping[str, Tuple[float, float]]]):
+        """Adds timing of building entities by path"""
+        for name, phases in timing.items():
+            for phase, (started, duration) in phases.items():
+                self.record(name, phase, started, duration)
+
+    def table(self) -> str:
+        phases: Dict[str, float] = {}
+        entities: Dict[str, Dict[str, float]] = {}
+        for name, phase, _, duration in self.events:
+            if name:
+                row = entities.setdefault(name, {})
+                row[phase] = row.get(phase, 0.0) + duration
+            else:
+                phases[phase] = phases.get(phase, 0.0) + duration
+        width = max([len(name) for name in entities] + [len('entity')])
+        lines = ['{:<{}}{:>10}'.format('phase', width, 'seconds')]
+        for phase, duration in phases.items():
+            lines.append('{:<{}}{:>10.4f}'.format(phase, width, duration))
+        lines.append('')
+        lines.append(
+            ''.join(['{:<{}}'.format('entity', width), *('{:>11}'.format(p) for p in PHASES), '{:>11}'.format('total')])
+        )
+        rows = sorted(entities.items(), key=lambda i: sum(i[1].values()), reverse=True)
+        for name, row in rows:
+            cells = ('{:>11.4f}'.format(row[p]) if p in row else '{:>11}'.format('-') for p in PHASES)
+            lines.append(''.join(['{:<{}}'.format(name, width), *cells, '{:>11.4f}'.format(sum(row.values()))]))
+        return '\n'.join(lines)
+
+    def chrome_trace(self) -> Dict:
+        pid = os.getpid()
+        tids: Dict[str, int] = {'': 0}
+        events = []
+        for name, phase, started, duration in self.events:
+            tid = tids.setdefault(name, len(tids))
+            events.append(
+                {
+                    'name': phase if not name else f'{name} {phase}',
+                    'cat': phase,
+                    'ph': 'X',
+                    'ts': (started - self._origin) * 1e6,
+                    'dur': duration * 1e6,
+                    'pid': pid,
+                    'tid': tid,
+                }
+            )
+        for name, tid in tids.items():
+            events.append(
+                {
+                    'name': 'thread_name',
+                    'ph': 'M',
+                    'pid': pid,
+                    'tid': tid,
+                    'args': {'name': name or 'phases'},
+                }
+            )
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, fd: IO[str]):
+        json.dump(self.chrome_trace(), fd)
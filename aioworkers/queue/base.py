@@ -1,34 +1,283 @@
 import asyncio
+import collections
+import contextvars
+import functools
 import time
-from typing import Callable, cast
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, cast
 
 from aioworkers.core.config import ValueExtractor
 
 from ..core.base import AbstractReader, AbstractWriter
+from ..core.metrics import Histogram, Meter
 from ..utils import import_name
 
+# queue which instrumented method is running, its nested calls are not counted
+_measured: contextvars.ContextVar[Optional['AbstractQueue']] = contextvars.ContextVar('measured', default=None)
+
+
+class QueueMetrics:
+    """
+    Put is recorded when item is in queue, putters waiting for free slot
+    are counted apart from depth. Dwell time is matched with puts
+    in FIFO order, so average is exact for any queue and quantiles
+    for FIFO queues.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.dwell = Histogram()
+        self.put = Meter(clock)
+        self.get = Meter(clock)
+        self.getters = 0
+        self.putters = 0
+        self.depth = 0
+        self.peak = 0
+        self._stamps: Deque[float] = collections.deque()
+        self._owed = 0  # items got before their put returned
+        self._clock = clock
+
+    def on_put(self, count: int):
+        owed = min(self._owed, count)
+        if owed:
+            self._owed -= owed
+            for _ in range(owed):
+                self.dwell.record(0.0)
+        self._stamps.extend([self._clock()] * (count - owed))
+        self.depth = len(self._stamps)
+        if self.depth > self.peak:
+            self.peak = self.depth
+        self.put.mark(count)
+
+    def on_get(self, count: int):
+        now = self._clock()
+        stamps = self._stamps
+        matched = min(count, len(stamps))
+        for _ in range(matched):
+            self.dwell.record(now - stamps.popleft())
+        if self.putters:
+            self._owed += count - matched
+        self.depth = len(stamps)
+        self.get.mark(count)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'depth': self.depth,
+            'peak': self.peak,
+            'getters': self.getters,
+            'putters': self.putters,
+            'put': self.put.rates(),
+            'get': self.get.rates(),
+            'dwell': self.dwell.summary(),
+        }
+
 
 class AbstractQueue(AbstractReader, AbstractWriter):
-    pass
+    """
+    config:
+        instrument: bool collect metrics of queue
+    """
 
+    _metrics: Optional[QueueMetrics] = None
+
+    def set_config(self, config) -> None:
+        super().set_config(config)
+        if self.config.get_bool('instrument', default=False):
+            self.instrument()
+
+    def instrument(self) -> None:
+        """Wraps methods of instance to collect metrics"""
+        if self._metrics is not None:
+            return
+        self._metrics = QueueMetrics()
+        for name in ('put', 'put_many', 'get', 'get_many'):
+            method = getattr(self, name)
+            wrapper = self._measure_put if name.startswith('put') else self._measure_get
+            setattr(self, name, functools.wraps(method)(functools.partial(wrapper, method, name.endswith('_many'))))
+
+    async def _measure_put(self, method, many: bool, value, *args, **kwargs):
+        metrics = self._metrics
+        if metrics is None or _measured.get() is self:
+            return await method(value, *args, **kwargs)
+        if many:
+            value = list(value)
+        metrics.putters += 1
+        token = _measured.set(self)
+        try:
+            result = await method(value, *args, **kwargs)
+            metrics.on_put(len(value) if many else 1)
+        finally:
+            metrics.putters -= 1
+            if not metrics.putters:
+                metrics._owed = 0
+            _measured.reset(token)
+        return result
+
+    async def _measure_get(self, method, many: bool, *args, **kwargs):
+        metrics = self._metrics
+        if metrics is None or _measured.get() is self:
+            return await method(*args, **kwargs)
+        metrics.getters += 1
+        token = _measured.set(self)
+        try:
+            result = await method(*args, **kwargs)
+        finally:
+            metrics.getters -= 1
+            _measured.reset(token)
+        metrics.on_get(len(result) if many else 1)
+        return result
+
+    def metrics(self) -> Optional[Dict[str, Any]]:
+        """Metrics of instrumented queue or None"""
+        if self._metrics is None:
+            return None
+        return self._metrics.summary()
+
+    async def get_many(self, max_items: int, *, timeout: Optional[float] = None) -> List[Any]:
+        """
+        Wait for at least one item and return up to max_items
+        which are available without waiting.
+        Raises asyncio.TimeoutError if nothing got within timeout.
+        """
+        if timeout:
+            value = await asyncio.wait_for(self.get(), timeout)
+        else:
+            value = await self.get()
+        return [value]
+
+    async def put_many(self, values: Iterable[Any]) -> None:
+        for value in values:
+            await self.put(value)
+
+    @property
+    def pressure(self) -> float:
+        """Fill level from 0 to 1, put waits at 1"""
+        return 0.0
+
+
+class BackpressureMixin:
+    """
+    Puts wait from maxsize (high watermark) until size
+    drops to low watermark, waiting puts are woken in FIFO order
+    no more than free slots.
+    config:
+        maxsize: int high watermark
+        low: int low watermark, default maxsize - 1
+    """
+
+    _maxsize: int
+    _low: Optional[int] = None
+    _throttled = False
+    _granted = 0
+    _putters: Deque[asyncio.Future]
+    __len__: Callable[[], int]
+
+    def full(self) -> bool:
+        high = self._maxsize
+        if not high or high <= 0:
+            return False
+        size = len(self)
+        if self._throttled:
+            low = high - 1 if self._low is None else self._low
+            if size > low:
+                return True
+            self._throttled = False
+        elif size >= high:
+            self._throttled = True
+            return True
+        return False
+
+    @property
+    def pressure(self) -> float:
+        if not self._maxsize or self._maxsize <= 0:
+            return 0.0
+        elif self.full():
+            return 1.0
+        return len(self) / self._maxsize
+
+    def _release_putters(self) -> None:
+        putters = self._putters
+        if not putters or self.full():
+            return
+        free = self._maxsize - len(self) - self._granted
+        while putters and free > 0:
+            f = putters.popleft()
+            if not f.done():
+                f.set_result(None)
+                self._granted += 1
+                free -= 1
+
+    async def _wait_putter(self) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        self._putters.append(waiter)
+        self._release_putters()
+        try:
+            await waiter
+        except BaseException:
+            if not waiter.done():
+                self._putters.remove(waiter)
+            elif not waiter.cancelled():
+                self._granted -= 1
+                self._release_putters()
+            raise
+        self._granted -= 1
+
+
+class Queue(BackpressureMixin, asyncio.Queue, AbstractQueue):
+    """
+    config:
+        maxsize: int high watermark
+        low: int low watermark, default maxsize - 1
+    """
 
-class Queue(asyncio.Queue, AbstractQueue):
     def __init__(self, config=None, *, loop=None, **kwargs):
         self._maxsize = kwargs.get('maxsize', 0)
+        self._low = kwargs.get('low')
         AbstractQueue.__init__(self, config, loop=loop, **kwargs)
         asyncio.Queue.__init__(self, maxsize=self._maxsize)
 
     def set_config(self, config) -> None:
         super().set_config(config)
         self._maxsize = self.config.get('maxsize', 0)
+        self._low = self.config.get('low')
 
     def __len__(self):
         return self.qsize()
 
+    def _wakeup_next(self, waiters):
+        if waiters is self._putters:
+            self._release_putters()
+        else:
+            super()._wakeup_next(waiters)  # type: ignore
+
+    async def put(self, item) -> None:
+        while True:
+            if self._putters or self.full():
+                await self._wait_putter()
+            try:
+                return self.put_nowait(item)
+            except asyncio.QueueFull:
+                pass
+
+    async def get_many(self, max_items: int, *, timeout: Optional[float] = None) -> List[Any]:
+        result: List[Any] = []
+        if self.empty():
+            get = asyncio.Queue.get(self)
+            result.append(await (asyncio.wait_for(get, timeout) if timeout else get))
+        while len(result) < max_items and not self.empty():
+            result.append(self.get_nowait())
+        return result
+
+    async def put_many(self, values: Iterable[Any]) -> None:
+        for value in values:
+            if self._putters or self.full():
+                await Queue.put(self, value)
+            else:
+                self.put_nowait(value)
+
 
 class PriorityQueue(asyncio.PriorityQueue, Queue):
     def __init__(self, config=None, *, loop=None, **kwargs):
         self._maxsize = kwargs.get('maxsize', 0)
+        self._low = kwargs.get('low')
         AbstractQueue.__init__(self, config, loop=loop, **kwargs)
         asyncio.Queue.__init__(self, maxsize=self._maxsize)
 
@@ -84,6 +333,19 @@ class ScoreQueueMixin:
         else:
             return val
 
+    def put_many(self, values, score=None):
+        if score is None:
+            if callable(self._default_score):
+                score = self._default_score()
+        return super().put_many([(score, v) for v in values])  # type: ignore
+
+    async def get_many(self, max_items, score=False, *, timeout=None):
+        items = await super().get_many(max_items, timeout=timeout)  # type: ignore
+        if score:
+            return [(val, s) for s, val in items]
+        else:
+            return [val for s, val in items]
+
 
 def score_queue(default_score=None):
     return lambda klass: type(
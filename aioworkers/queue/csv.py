@@ -1,25 +1,121 @@
 import asyncio
+import collections
 import csv
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
 
-from ..core.base import AbstractReader
+from ..core.base import AbstractReader, ExecutorEntity
+from ..core.config import BooleanValueMatcher
+from ..utils import import_name
 
+TYPES: Dict[str, Callable[[str], Any]] = {
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': BooleanValueMatcher.fn,
+}
+
+
+class DictReader(ExecutorEntity, AbstractReader):
+    """
+    Reader of rows as dicts from csv file.
+    Rows are parsed by chunks in executor,
+    EOFError is raised at end of file.
+    config:
+        file: str path to csv file
+        encoding: str encoding of file
+        fields: list of field names, default first row of file
+        types: mapping field to type name (str, int, float, bool)
+            or path to callable, empty values become None
+        delimiter: str, default ","
+        chunk: int count of rows parsed per executor call, default 10000
+        executor: executor for parsing
+    """
+
+    _fields: Sequence[str]
 
-class DictReader(AbstractReader):
     async def init(self):
-        self._executor = None  # TODO
+        await super().init()
         self._lock = asyncio.Lock()
-        self._file = open(self.config.file)
-        self._reader = csv.DictReader(self._file)
+        self._rows: Deque[Dict[str, Any]] = collections.deque()
+        self._eof = False
+        self._error: Optional[Exception] = None
+        self._chunk = self.config.get_int('chunk', default=10000)
+        self._file = open(self.config.file, encoding=self.config.get('encoding'), newline='')
+        self._reader = csv.reader(self._file, delimiter=self.config.get('delimiter', ','))
+        self._fields = self.config.get('fields') or ()
+        self._types = self.config.get('types') or {}
+        self._converters: Optional[List[Tuple[int, Callable]]] = None
         self.context.on_cleanup.append(self.cleanup)
 
-    async def get(self):
-        # will not raise an exception StopIteration TODO ?
+    def _prepare(self) -> List[Tuple[int, Callable]]:
+        if not self._fields:
+            self._fields = next(self._reader, ())
+        converters = []
+        for i, field in enumerate(self._fields):
+            name = self._types.get(field)
+            if name:
+                converters.append((i, TYPES.get(name) or import_name(name)))
+        return converters
+
+    def _read(self) -> List[Dict[str, Any]]:
+        """Parses up to chunk rows skipping blank ones, marks end of file"""
+        if self._converters is None:
+            self._converters = self._prepare()
+        converters = self._converters
+        fields = self._fields
+        width = len(fields)
+        result: List[Dict[str, Any]] = []
+        if not width:
+            self._eof = True
+            return result
+        for row in self._reader:
+            if not row:
+                continue
+            try:
+                for i, convert in converters:
+                    if i < len(row):
+                        value = row[i]
+                        row[i] = convert(value) if value else None  # type: ignore
+            except Exception as e:
+                if not result:
+                    raise
+                # rows parsed before are returned, error is raised by next read
+                self._error = e
+                break
+            item: Dict[Any, Any] = dict(zip(fields, row))
+            if len(row) < width:
+                item.update(dict.fromkeys(fields[len(row) :]))
+            elif len(row) > width:
+                item[None] = row[width:]
+            result.append(item)
+            if len(result) >= self._chunk:
+                break
+        else:
+            self._eof = True
+        return result
+
+    async def _fill(self) -> bool:
         async with self._lock:
-            return await self.loop.run_in_executor(
-                self._executor,
-                next,
-                self._reader,
-            )
+            if not self._rows and self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            elif not self._rows and not self._eof:
+                self._rows.extend(await self.run_in_executor(self._read))
+        return bool(self._rows)
+
+    async def get(self) -> Dict[str, Any]:
+        if not self._rows and not await self._fill():
+            raise EOFError(self.config.file)
+        return self._rows.popleft()
+
+    async def get_many(self, max_items: int, *, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        if not self._rows and not await self._fill():
+            raise EOFError(self.config.file)
+        rows = self._rows
+        if len(rows) <= max_items:
+            self._rows = collections.deque()
+            return list(rows)
+        return [rows.popleft() for _ in range(max_items)]
 
     def cleanup(self):
         self._file.close()
@@ -0,0 +1,328 @@
+import asyncio
+import collections
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, BinaryIO, Deque, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from ..core.base import ExecutorEntity
+from ..core.formatter import FormattedEntity
+from .base import AbstractQueue
+
+logger = logging.getLogger(__name__)
+RECORD = struct.Struct('!QI')
+TAG = struct.Struct('!Q')
+LOG = '.log'
+ACK = '.ack'
+
+
+class Record(NamedTuple):
+    tag: int
+    segment: int
+    data: Any
+
+
+class DurableQueue(FormattedEntity, ExecutorEntity, AbstractQueue):
+    """
+    Persistent queue in append-only segment log.
+    Values got with receive stay pending until ack,
+    pending values are recovered on init.
+    config:
+        path: str directory of segments
+        format: str formatter of values
+        executor: executor for file operations
+        flush_interval: duration between flushes to disk, default 10ms
+        flush_size: size of buffer for immediate flush, default 1M
+        segment_size: size of segment for rotation, default 64M
+        fsync: bool fsync on each flush, default true
+        sync: bool put waits flush, default false
+    """
+
+    _getters: Deque[asyncio.Future]
+    _ready: Deque[Record]
+    _unacked: Dict[int, Record]
+    _live: Dict[int, int]
+
+    def __init__(self, *args, **kwargs):
+        self._ready = collections.deque()
+        self._getters = collections.deque()
+        self._unacked = {}
+        self._live = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._buffer: List[Tuple[int, bytearray]] = []
+        self._acks: Dict[int, bytearray] = {}
+        self._compact: Set[int] = set()
+        self._flush_waiters: List[asyncio.Future] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._fd: Optional[BinaryIO] = None
+        self._fd_segment = -1
+        self._tag = 0
+        self._segment = 0
+        self._segment_bytes = 0
+        self._buffer_bytes = 0
+        super().__init__(*args, **kwargs)
+        self._read_config()
+
+    def set_config(self, config):
+        super().set_config(config)
+        self._read_config()
+
+    def _read_config(self):
+        self._path = Path(self.config.get('path', '.'))
+        self._flush_interval = self.config.get_duration('flush_interval', default=0.01)
+        self._flush_size = self.config.get_size('flush_size', default='1M')
+        self._segment_size = self.config.get_size('segment_size', default='64M')
+        self._fsync = self.config.get_bool('fsync', default=True)
+        self._sync = self.config.get_bool('sync', default=False)
+
+    def set_context(self, context):
+        super().set_context(context)
+        context.on_cleanup.append(self.cleanup)
+
+    async def init(self):
+        await super().init()
+        self._dirty = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        await self.run_in_executor(self._recover)
+        self._flusher = self.loop.create_task(self._flush_loop())
+
+    def _segment_path(self, segment: int, suffix: str) -> Path:
+        return self._path / f'{segment:012d}{suffix}'
+
+    def _recover(self):
+        self._path.mkdir(parents=True, exist_ok=True)
+        segments = sorted(int(p.stem) for p in self._path.glob('*' + LOG))
+        for segment in segments:
+            acked: Set[int] = set()
+            ack_path = self._segment_path(segment, ACK)
+            if ack_path.exists():
+                data = ack_path.read_bytes()
+                end = len(data) - len(data) % TAG.size
+                acked.update(i for (i,) in TAG.iter_unpack(data[:end]))
+            live = 0
+            for tag, data in self._read_segment(segment):
+                self._tag = max(self._tag, tag)
+                if tag not in acked:
+                    self._ready.append(Record(tag, segment, data))
+                    live += 1
+            self._segment = segment + 1
+            if live:
+                self._live[segment] = live
+            else:
+                self._compact.add(segment)
+
+    def _read_segment(self, segment: int) -> Iterable[Tuple[int, memoryview]]:
+        with open(self._segment_path(segment, LOG), 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if not size:
+                return
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[segment] = m
+        view = memoryview(m)
+        offset = 0
+        while offset + RECORD.size <= size:
+            tag, length = RECORD.unpack_from(view, offset)
+            offset += RECORD.size
+            if offset + length > size:
+                break  # torn write at the tail
+            yield tag, view[offset : offset + length]
+            offset += length
+
+    def __len__(self) -> int:
+        return len(self._ready)
+
+    def empty(self) -> bool:
+        return not self._ready
+
+    @property
+    def unacked(self) -> int:
+        return len(self._unacked)
+
+    def _append(self, value) -> Record:
+        data = self.encode(value)
+        if self._segment_bytes >= self._segment_size:
+            if self._segment not in self._live:
+                self._compact.add(self._segment)
+            self._segment += 1
+            self._segment_bytes = 0
+        segment = self._segment
+        self._tag += 1
+        if self._buffer and self._buffer[-1][0] == segment:
+            buffer = self._buffer[-1][1]
+        else:
+            buffer = bytearray()
+            self._buffer.append((segment, buffer))
+        size = RECORD.size + len(data)
+        buffer += RECORD.pack(self._tag, len(data))
+        buffer += data
+        self._segment_bytes += size
+        self._buffer_bytes += size
+        self._live[segment] = self._live.get(segment, 0) + 1
+        return Record(self._tag, segment, data)
+
+    def _send(self, record: Record) -> bool:
+        while self._getters:
+            f = self._getters.popleft()
+            if not f.done():
+                self._unacked[record.tag] = record
+                f.set_result(record)
+                return True
+        return False
+
+    async def put(self, value):
+        record = self._append(value)
+        if not self._send(record):
+            self._ready.append(record)
+        await self._written()
+
+    async def put_many(self, values: Iterable):
+        for value in values:
+            record = self._append(value)
+            if not self._send(record):
+                self._ready.append(record)
+        await self._written()
+
+    async def _written(self):
+        if self._buffer_bytes >= self._flush_size:
+            await self.flush()
+        elif self._sync:
+            waiter = self.loop.create_future()
+            self._flush_waiters.append(waiter)
+            self._dirty.set()
+            await waiter
+        else:
+            self._dirty.set()
+
+    async def receive(self, *, timeout: Optional[float] = None) -> Tuple[int, Any]:
+        """Returns tag and value, value stays pending until ack or nack"""
+        if self._ready:
+            record = self._ready.popleft()
+            self._unacked[record.tag] = record
+        else:
+            waiter = self.loop.create_future()
+            self._getters.append(waiter)
+            if timeout:
+                record = await asyncio.wait_for(waiter, timeout)
+            else:
+                record = await waiter
+        return record.tag, self.decode(bytes(record.data))
+
+    async def get(self, *, timeout: Optional[float] = None):
+        tag, value = await self.receive(timeout=timeout)
+        self.ack(tag)
+        return value
+
+    async def get_many(self, max_items: int, *, timeout: Optional[float] = None) -> List:
+        result = [await self.get(timeout=timeout)]
+        while self._ready and len(result) < max_items:
+            record = self._ready.popleft()
+            self._ack_record(record)
+            result.append(self.decode(bytes(record.data)))
+        return result
+
+    def ack(self, tag: int):
+        record = self._unacked.pop(tag)
+        self._ack_record(record)
+
+    def _ack_record(self, record: Record):
+        segment = record.segment
+        buffer = self._acks.get(segment)
+        if buffer is None:
+            buffer = self._acks[segment] = bytearray()
+        buffer += TAG.pack(record.tag)
+        live = self._live[segment] - 1
+        if live:
+            self._live[segment] = live
+        else:
+            del self._live[segment]
+            if segment != self._segment:
+                self._compact.add(segment)
+        self._dirty.set()
+
+    def nack(self, tag: int):
+        record = self._unacked.pop(tag)
+        if not self._send(record):
+            self._ready.appendleft(record)
+
+    async def _flush_loop(self):
+        while True:
+            await self._dirty.wait()
+            if self._flush_interval:
+                await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception('Flush error %s', self._path)
+
+    async def flush(self):
+        async with self._flush_lock:
+            self._dirty.clear()
+            buffer, self._buffer = self._buffer, []
+            self._buffer_bytes = 0
+            acks, self._acks = self._acks, {}
+            compact, self._compact = self._compact, set()
+            for segment in compact:
+                self._maps.pop(segment, None)
+            waiters, self._flush_waiters = self._flush_waiters, []
+            try:
+                await self.run_in_executor(self._write, buffer, acks, compact)
+            except BaseException as e:
+                for f in waiters:
+                    if not f.done():
+                        f.set_exception(e)
+                raise
+            for f in waiters:
+                if not f.done():
+                    f.set_result(None)
+
+    def _write(self, buffer, acks, compact):
+        fd = self._fd
+        for segment, data in buffer:
+            if self._fd_segment != segment:
+                self._close_fd()
+                self._fd = fd = open(self._segment_path(segment, LOG), 'ab')
+                self._fd_segment = segment
+            assert fd is not None
+            fd.write(data)
+        if self._fd is not None and buffer:
+            self._fd.flush()
+            if self._fsync:
+                os.fsync(self._fd.fileno())
+        for segment, data in acks.items():
+            if segment in compact:
+                continue
+            with open(self._segment_path(segment, ACK), 'ab') as f:
+                f.write(data)
+                if self._fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        for segment in compact:
+            if segment == self._fd_segment:
+                self._close_fd()
+            for suffix in (LOG, ACK):
+                path = self._segment_path(segment, suffix)
+                if path.exists():
+                    path.unlink()
+
+    def _close_fd(self):
+        if self._fd is not None:
+            self._fd.close()
+            self._fd = None
+            self._fd_segment = -1
+
+    async def cleanup(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        await self.run_in_executor(self._close_fd)
+        while self._getters:
+            f = self._getters.popleft()
+            if not f.done():
+                f.cancel()
@@ -0,0 +1,170 @@
+import asyncio
+import collections
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from ..utils import import_name
+from .base import AbstractQueue, BackpressureMixin
+
+
+class Lane:
+    __slots__ = ('name', 'weight', 'items', 'deficit', 'put', 'got', 'wait_sum', 'wait_max')
+
+    def __init__(self, name: str, weight: float):
+        self.name = name
+        self.weight = weight
+        self.items: Deque[Tuple[float, Any]] = collections.deque()
+        self.deficit = 0.0
+        self.put = 0
+        self.got = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'weight': self.weight,
+            'len': len(self.items),
+            'put': self.put,
+            'got': self.got,
+            'wait_avg': self.wait_sum / self.got if self.got else 0.0,
+            'wait_max': self.wait_max,
+        }
+
+
+class WeightedFairQueue(BackpressureMixin, AbstractQueue):
+    """
+    Queue with named lanes served by deficit round robin,
+    each lane gets items in proportion to weight.
+    config:
+        lanes: mapping name of lane to weight
+        weight: weight of lane created on put, default 1
+        default_lane: str lane for put without lane, default "default"
+        lane: str.path to callable returns lane of value
+        maxsize: int high watermark
+        low: int low watermark, default maxsize - 1
+    """
+
+    _lane_of: Optional[Callable[[Any], str]] = None
+
+    def __init__(self, *args, **kwargs):
+        self._lanes: Dict[str, Lane] = {}
+        self._active: Deque[Lane] = collections.deque()
+        self._getters: Deque[asyncio.Future] = collections.deque()
+        self._putters = collections.deque()
+        self._size = 0
+        self._maxsize = 0
+        self._weight = 1.0
+        self._default_lane = 'default'
+        super().__init__(*args, **kwargs)
+
+    def set_config(self, config):
+        super().set_config(config)
+        for name, weight in (self.config.get('lanes') or {}).items():
+            self.set_weight(name, weight)
+        self._weight = self.config.get_float('weight', default=1.0)
+        self._default_lane = self.config.get('default_lane', 'default')
+        lane = self.config.get('lane')
+        if lane:
+            self._lane_of = import_name(lane)
+        self._maxsize = self.config.get_int('maxsize', null=True, default=0)
+        self._low = self.config.get_int('low', null=True, default=None)
+
+    async def init(self):
+        await super().init()
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+
+    def set_weight(self, lane: str, weight: float):
+        if weight <= 0:
+            raise ValueError(f'Weight of lane {lane} must be positive')
+        if lane in self._lanes:
+            self._lanes[lane].weight = weight
+        else:
+            self._lanes[lane] = Lane(lane, weight)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return not self._size
+
+    def lane_size(self, lane: str) -> int:
+        item = self._lanes.get(lane)
+        return len(item.items) if item else 0
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: lane.stats() for name, lane in self._lanes.items()}
+
+    def _lane(self, value, lane: Optional[str]) -> Lane:
+        if lane is None:
+            if self._lane_of is not None:
+                lane = self._lane_of(value)
+            else:
+                lane = self._default_lane
+        result = self._lanes.get(lane)
+        if result is None:
+            result = self._lanes[lane] = Lane(lane, self._weight)
+        return result
+
+    def _push(self, lane: Lane, value, now: float):
+        lane.put += 1
+        while self._getters:
+            f = self._getters.popleft()
+            if not f.done():
+                lane.got += 1
+                f.set_result(value)
+                return
+        if not lane.items:
+            self._active.append(lane)
+        lane.items.append((now, value))
+        self._size += 1
+
+    def _pop(self, now: float):
+        active = self._active
+        lane = active[0]
+        while lane.deficit < 1:
+            lane.deficit += lane.weight
+            if lane.deficit < 1:
+                active.rotate(-1)
+                lane = active[0]
+        lane.deficit -= 1
+        timestamp, value = lane.items.popleft()
+        if not lane.items:
+            lane.deficit = 0.0
+            active.popleft()
+        elif lane.deficit < 1:
+            active.rotate(-1)
+        self._size -= 1
+        wait = now - timestamp
+        lane.got += 1
+        lane.wait_sum += wait
+        if wait > lane.wait_max:
+            lane.wait_max = wait
+        return value
+
+    async def put(self, value, lane: Optional[str] = None):
+        if self._putters or self.full():
+            await self._wait_putter()
+        self._push(self._lane(value, lane), value, self.loop.time())
+
+    async def put_many(self, values: Iterable, lane: Optional[str] = None):
+        for value in values:
+            await self.put(value, lane=lane)
+
+    async def get(self, *, timeout: Optional[float] = None):
+        if self._size:
+            value = self._pop(self.loop.time())
+            self._release_putters()
+            return value
+        waiter = self.loop.create_future()
+        self._getters.append(waiter)
+        if timeout:
+            return await asyncio.wait_for(waiter, timeout)
+        return await waiter
+
+    async def get_many(self, max_items: int, *, timeout: Optional[float] = None) -> List:
+        result = [await self.get(timeout=timeout)]
+        now = self.loop.time()
+        while self._size and len(result) < max_items:
+            result.append(self._pop(now))
+        self._release_putters()
+        return result
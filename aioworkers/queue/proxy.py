@@ -1,61 +1,364 @@
 import asyncio
+import collections
+import contextlib
+import logging
+import os
+import queue
+import stat
 import sys
+import threading
+import time
+from typing import Any, Deque, List, Optional
 
 from ..core.base import ExecutorEntity
 from ..core.formatter import FormattedEntity
 from .base import AbstractQueue
 
+logger = logging.getLogger(__name__)
+POLL = 0.1
+
 
 class ProxyQueue(ExecutorEntity, AbstractQueue):
+    """
+    Proxy to blocking queue set by set_queue.
+    config:
+        prefetch: int size of local buffers, enables background threads
+            which get and put values of blocking queue by batches
+        flush_interval: duration for collect puts to batch, default 10ms
+        close_timeout: duration to put buffered values to full queue
+            on cleanup, default 1s
+    """
+
+    _prefetch = 0
+    _flush_interval = 0.01
+    _close_timeout = 1.0
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._lock: asyncio.Lock = None  # type: ignore
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+        self._buffered = 0
+        self._get_cond = threading.Condition()
+        self._put_buffer: List[Any] = []
+        self._put_cond = threading.Condition()
+        self._put_pending = 0
+        self._putters: List[asyncio.Future] = []
+
+    def set_config(self, config):
+        super().set_config(config)
+        self._prefetch = self.config.get_int('prefetch', default=0)
+        self._flush_interval = self.config.get_duration('flush_interval', default=0.01)
+        self._close_timeout = self.config.get_duration('close_timeout', default=1)
+
+    def set_context(self, context):
+        super().set_context(context)
+        context.on_cleanup.append(self.cleanup)
 
     async def init(self):
         lock = asyncio.Lock()
         await lock.acquire()
         self._lock = lock
+        self._buffer: asyncio.Queue = asyncio.Queue()
 
     def set_queue(self, queue):
         self._queue = queue
         self._lock.release()
+        if self._prefetch:
+            self._closed = False
+            for target in (self._drain, self._flush):
+                thread = threading.Thread(target=target, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _drain(self):
+        while not self._closed:
+            with self._get_cond:
+                while self._buffered >= self._prefetch and not self._closed:
+                    self._get_cond.wait()
+                room = self._prefetch - self._buffered
+            try:
+                batch = [self._queue.get(timeout=POLL)]
+            except queue.Empty:
+                continue
+            while len(batch) < room:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self._get_cond:
+                self._buffered += len(batch)
+            try:
+                self.loop.call_soon_threadsafe(self._feed, batch)
+            except RuntimeError:  # loop closed
+                return
+
+    def _feed(self, batch: List):
+        for value in batch:
+            self._buffer.put_nowait(value)
+
+    def _release(self, count: int):
+        with self._get_cond:
+            full = self._buffered >= self._prefetch
+            self._buffered -= count
+            if full:
+                self._get_cond.notify()
+
+    def _flush(self):
+        while True:
+            with self._put_cond:
+                while not self._put_buffer and not self._closed:
+                    self._put_cond.wait()
+                if not self._put_buffer:
+                    return
+                if self._flush_interval and len(self._put_buffer) < self._prefetch:
+                    self._put_cond.wait(self._flush_interval)
+                values, self._put_buffer = self._put_buffer, []
+            self._put_blocking(values)
+            try:
+                self.loop.call_soon_threadsafe(self._flushed, len(values))
+            except RuntimeError:  # loop closed
+                return
+
+    def _put_blocking(self, values: List) -> int:
+        """Puts values to blocking queue, gives up after close_timeout on full queue when closed"""
+        deadline = None
+        for i, value in enumerate(values):
+            while True:
+                try:
+                    self._queue.put(value, timeout=POLL)
+                    break
+                except queue.Full:
+                    if not self._closed:
+                        continue
+                    elif deadline is None:
+                        deadline = time.monotonic() + self._close_timeout
+                    elif time.monotonic() >= deadline:
+                        logger.warning('Lost %s values of %s on full queue', len(values) - i, self.config.get('name'))
+                        return i
+        return len(values)
+
+    def _flushed(self, count: int):
+        self._put_pending -= count
+        putters, self._putters = self._putters, []
+        for f in putters:
+            if not f.done():
+                f.set_result(None)
+
+    async def _put_buffered(self, values: List):
+        while self._put_pending >= self._prefetch:
+            f = self.loop.create_future()
+            self._putters.append(f)
+            await f
+        self._put_pending += len(values)
+        with self._put_cond:
+            self._put_buffer.extend(values)
+            if len(self._put_buffer) == len(values) or len(self._put_buffer) >= self._prefetch:
+                self._put_cond.notify()
 
     async def get(self):
+        if self._prefetch:
+            value = await self._buffer.get()
+            self._release(1)
+            return value
         async with self._lock:
             return await self.run_in_executor(self._queue.get)
 
     async def put(self, value):
+        if self._prefetch:
+            return await self._put_buffered([value])
         async with self._lock:
             return await self.run_in_executor(self._queue.put, value)
 
+    def _get_many(self, max_items, timeout=None):
+        result = [self._queue.get(timeout=timeout)]
+        while len(result) < max_items:
+            try:
+                result.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return result
+
+    async def get_many(self, max_items, *, timeout=None):
+        if self._prefetch:
+            if timeout:
+                result = [await asyncio.wait_for(self._buffer.get(), timeout)]
+            else:
+                result = [await self._buffer.get()]
+            while len(result) < max_items and not self._buffer.empty():
+                result.append(self._buffer.get_nowait())
+            self._release(len(result))
+            return result
+        async with self._lock:
+            try:
+                return await self.run_in_executor(self._get_many, max_items, timeout)
+            except queue.Empty:
+                raise asyncio.TimeoutError(timeout) from None
+
+    def _put_many(self, values):
+        for value in values:
+            self._queue.put(value)
+
+    async def put_many(self, values):
+        values = list(values)
+        if self._prefetch:
+            return await self._put_buffered(values)
+        async with self._lock:
+            return await self.run_in_executor(self._put_many, values)
+
+    async def cleanup(self):
+        self._closed = True
+        for cond in (self._get_cond, self._put_cond):
+            with cond:
+                cond.notify_all()
+        threads, self._threads = self._threads, []
+        for thread in threads:
+            await self.run_in_executor(thread.join)
+        if not self._prefetch or self._buffer.empty():
+            return
+        # return prefetched values which were not consumed
+        values = []
+        while not self._buffer.empty():
+            values.append(self._buffer.get_nowait())
+        self._release(len(values))
+        await self.run_in_executor(self._put_blocking, values)
+
 
 class PipeLineQueue(FormattedEntity, ExecutorEntity, AbstractQueue):
+    """
+    Queue of lines from reader to writer, stdin and stdout by default.
+    Pipes are read by loop without threads.
+    config:
+        format: str formatter of lines
+        timeout: duration of sleep at end of reader, get returns None without it
+        chunk_size: size of chunk from reader, default 64K
+        flush_size: size of write buffer, default 0 writes each put
+        flush_interval: max delay of buffered writes, default 10ms
+    """
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._read_lock = asyncio.Lock()
         self._write_lock = asyncio.Lock()
+        self._write_buffer = bytearray()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._transport: Optional[asyncio.BaseTransport] = None
+        self._reader_blocking = False
         self.set_reader(sys.stdin.buffer)
         self.set_writer(sys.stdout.buffer)
+        self._read_config()
+
+    def set_config(self, config):
+        super().set_config(config)
+        self._read_config()
+
+    def _read_config(self):
         self._timeout = self.config.get('timeout')
+        self._chunk_size = self.config.get_size('chunk_size', default='64K')
+        self._flush_size = self.config.get_size('flush_size', default=0)
+        self._flush_interval = self.config.get_duration('flush_interval', default=0.01)
+
+    def set_context(self, context):
+        super().set_context(context)
+        context.on_cleanup.append(self.cleanup)
 
     def set_reader(self, reader):
         self._reader = reader
+        self._stream: Optional[asyncio.StreamReader] = None
+        self._pipe: Optional[bool] = None
+        self._lines: Deque[bytes] = collections.deque()
+        self._tail = b''
 
     def set_writer(self, writer):
         self._writer = writer
 
+    def _is_pipe(self) -> bool:
+        try:
+            mode = os.fstat(self._reader.fileno()).st_mode
+        except (AttributeError, OSError, ValueError):
+            return False
+        return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode)
+
+    async def _read_chunk(self) -> bytes:
+        if self._pipe is None:
+            self._pipe = self._is_pipe()
+            if self._pipe:
+                fd = self._reader.fileno()
+                self._reader_blocking = os.get_blocking(fd)
+                # transport closes own duplicate, not reader (stdin)
+                pipe = os.fdopen(os.dup(fd), 'rb', buffering=0)
+                stream = asyncio.StreamReader(limit=self._chunk_size)
+                protocol = asyncio.StreamReaderProtocol(stream)
+                self._transport, _ = await self.loop.connect_read_pipe(lambda: protocol, pipe)
+                self._stream = stream
+        if self._stream is not None:
+            return await self._stream.read(self._chunk_size)
+        read = getattr(self._reader, 'read1', None) or self._reader.read
+        return await self.run_in_executor(read, self._chunk_size)
+
+    def _split(self, chunk: bytes):
+        lines = (self._tail + chunk).split(b'\n')
+        self._tail = lines.pop()
+        self._lines.extend([line + b'\n' for line in lines])
+
     async def get(self):
         async with self._read_lock:
-            while True:
-                v = await self.run_in_executor(self._reader.readline)
-                if v:
-                    break
+            while not self._lines:
+                chunk = await self._read_chunk()
+                if chunk:
+                    self._split(chunk)
+                elif self._tail:
+                    self._lines.append(self._tail)
+                    self._tail = b''
                 elif not self._timeout:
                     return
-                await asyncio.sleep(self._timeout)
+                else:
+                    await asyncio.sleep(self._timeout)
+            v = self._lines.popleft()
         return self.decode(v)
 
     async def put(self, value):
-        value = self.encode(value)
+        return await self._write(self.encode(value))
+
+    async def put_many(self, values):
+        return await self._write(b''.join(self.encode(v) for v in values))
+
+    async def _write(self, data: bytes):
+        if not self._flush_size:
+            async with self._write_lock:
+                return await self.run_in_executor(self._writer.write, data)
+        self._write_buffer += data
+        if len(self._write_buffer) >= self._flush_size:
+            await self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self.loop.call_later(self._flush_interval, self._on_flush)
+
+    def _on_flush(self):
+        self._flush_handle = None
+        self._flush_task = self.loop.create_task(self.flush())
+
+    def _write_flush(self, data: bytes):
+        self._writer.write(data)
+        flush = getattr(self._writer, 'flush', None)
+        if flush is not None:
+            flush()
+
+    async def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
         async with self._write_lock:
-            return await self.run_in_executor(self._writer.write, value)
+            data, self._write_buffer = self._write_buffer, bytearray()
+            if data:
+                await self.run_in_executor(self._write_flush, bytes(data))
+
+    async def cleanup(self):
+        await self.flush()
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+            if self._reader_blocking:
+                # duplicate shares O_NONBLOCK flag with reader
+                with contextlib.suppress(OSError, ValueError):
+                    os.set_blocking(self._reader.fileno(), True)
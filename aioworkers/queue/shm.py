@@ -0,0 +1,248 @@
+import asyncio
+import fcntl
+import os
+import pickle
+import struct
+import tempfile
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .base import AbstractQueue
+
+try:
+    from multiprocessing import resource_tracker
+except ImportError:  # pragma: no cover
+    resource_tracker = None  # type: ignore
+
+HEADER = struct.Struct('=QQQQQ')
+HEADER_SIZE = 64
+HEAD, TAIL, WAITING, PUTS, GOTS = 0, 8, 16, 24, 32
+COUNTER = struct.Struct('=Q')
+RECORD = struct.Struct('=IB')
+WRAP = 0xFFFFFFFF
+RAW, PICKLE = 0, 1
+
+
+class SharedMemoryQueue(AbstractQueue):
+    """
+    Ring buffer in shared memory attached by name,
+    processes with the same buffer name share one queue.
+    Values bytes are passed without serialization, other are pickled.
+    Bytes are copied once out of the ring on get, a view is not returned
+    because the slot is reused by producers of other processes.
+    Locks between processes are taken without blocking of loop.
+    config:
+        buffer: str name of shared memory, default aioworkers-{name}
+        size: size of buffer, default 16M
+        poll: duration of recheck while waiting, default 0.1
+        unlink: bool remove shared memory on cleanup, default false
+    """
+
+    _shm: Optional[shared_memory.SharedMemory] = None
+
+    def __init__(self, *args, **kwargs):
+        self._reader_fd: Optional[int] = None
+        self._writer_fd: Optional[int] = None
+        self._lock_fds: Dict[str, int] = {}
+        super().__init__(*args, **kwargs)
+
+    def set_context(self, context):
+        super().set_context(context)
+        context.on_cleanup.append(self.cleanup)
+
+    def _read_config(self):
+        name = self.config.get('name') or str(os.getpid())
+        self._buffer = self.config.get('buffer') or f'aioworkers-{name}'.replace('.', '-')
+        self._size = self.config.get_size('size', default='16M')
+        self._poll = self.config.get_duration('poll', default=0.1)
+        self._unlink = self.config.get_bool('unlink', default=False)
+        self._dir = Path(tempfile.gettempdir())
+
+    async def init(self):
+        await super().init()
+        self._read_config()
+        self.attach()
+
+    def attach(self):
+        try:
+            shm = shared_memory.SharedMemory(self._buffer, create=True, size=self._size)
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(self._buffer)
+        if resource_tracker is not None:
+            try:
+                resource_tracker.unregister(shm._name, 'shared_memory')  # type: ignore
+            except Exception:  # pragma: no cover
+                pass
+        self._shm = shm
+        self._buf = shm.buf
+        self._capacity = shm.size - HEADER_SIZE
+        self._fifo = self._dir / f'{self._buffer}.fifo'
+        try:
+            os.mkfifo(self._fifo)
+        except FileExistsError:
+            pass
+
+    async def _lock(self, kind: str) -> int:
+        fd = self._lock_fds.get(kind)
+        if fd is None:
+            path = self._dir / f'{self._buffer}.{kind}.lock'
+            fd = self._lock_fds[kind] = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                # held by other process, critical sections are short
+                await asyncio.sleep(self._poll / 100)
+
+    def __len__(self) -> int:
+        *_, puts, gots = HEADER.unpack_from(self._buf, 0)
+        return puts - gots
+
+    def empty(self) -> bool:
+        head, tail, *_ = HEADER.unpack_from(self._buf, 0)
+        return head == tail
+
+    def _write(self, kind: int, data) -> bool:
+        buf = self._buf
+        capacity = self._capacity
+        head, tail, waiting, puts, _ = HEADER.unpack_from(buf, 0)
+        pos = tail % capacity
+        need = RECORD.size + len(data)
+        free = capacity - pos
+        if need > free:
+            if tail + free + need - head > capacity:
+                return False
+            if free >= RECORD.size:
+                RECORD.pack_into(buf, HEADER_SIZE + pos, WRAP, RAW)
+            tail += free
+            pos = 0
+        elif tail + need - head > capacity:
+            return False
+        offset = HEADER_SIZE + pos
+        RECORD.pack_into(buf, offset, len(data), kind)
+        offset += RECORD.size
+        buf[offset : offset + len(data)] = data
+        COUNTER.pack_into(buf, TAIL, tail + need)
+        COUNTER.pack_into(buf, PUTS, puts + 1)
+        if waiting:
+            COUNTER.pack_into(buf, WAITING, 0)
+            self._notify()
+        return True
+
+    def _read(self):
+        buf = self._buf
+        capacity = self._capacity
+        head, tail, _, _, gots = HEADER.unpack_from(buf, 0)
+        if head == tail:
+            return False, None
+        pos = head % capacity
+        if capacity - pos < RECORD.size:
+            head += capacity - pos
+            pos = 0
+        length, kind = RECORD.unpack_from(buf, HEADER_SIZE + pos)
+        if length == WRAP:
+            head += capacity - pos
+            pos = 0
+            length, kind = RECORD.unpack_from(buf, HEADER_SIZE)
+        offset = HEADER_SIZE + pos + RECORD.size
+        data = buf[offset : offset + length]
+        try:
+            value = pickle.loads(data) if kind == PICKLE else bytes(data)
+        finally:
+            data.release()
+            COUNTER.pack_into(buf, HEAD, head + RECORD.size + length)
+            COUNTER.pack_into(buf, GOTS, gots + 1)
+        return True, value
+
+    def _notify(self):
+        if self._writer_fd is None:
+            try:
+                self._writer_fd = os.open(self._fifo, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError:
+                return  # nobody waits
+        try:
+            os.write(self._writer_fd, b'\0')
+        except BlockingIOError:
+            pass
+        except OSError:
+            os.close(self._writer_fd)
+            self._writer_fd = None
+
+    async def put(self, value: Any):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            kind, data = RAW, value
+        else:
+            kind, data = PICKLE, pickle.dumps(value, protocol=5)
+        if RECORD.size * 2 + len(data) > self._capacity:
+            raise ValueError(f'Value size {len(data)} exceeds buffer {self._buffer}')
+        while True:
+            fd = await self._lock('put')
+            try:
+                if self._write(kind, data):
+                    return
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            await asyncio.sleep(self._poll / 100)
+
+    async def get(self, *, timeout: Optional[float] = None):
+        deadline = timeout and self.loop.time() + timeout
+        while True:
+            fd = await self._lock('get')
+            try:
+                ok, value = self._read()
+                if not ok:
+                    COUNTER.pack_into(self._buf, WAITING, 1)
+                    ok, value = self._read()
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            if ok:
+                return value
+            wait = self._poll
+            if deadline:
+                wait = min(wait, deadline - self.loop.time())
+                if wait <= 0:
+                    raise asyncio.TimeoutError(timeout)
+            await self._wait(wait)
+
+    async def _wait(self, timeout: float):
+        if self._reader_fd is None:
+            # own write end keeps fifo from end of file when producers close it
+            self._reader_fd = os.open(self._fifo, os.O_RDWR | os.O_NONBLOCK)
+        fd = self._reader_fd
+        waiter = self.loop.create_future()
+        self.loop.add_reader(fd, self._wakeup, waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.loop.remove_reader(fd)
+        try:
+            os.read(fd, 4096)
+        except BlockingIOError:
+            pass
+
+    @staticmethod
+    def _wakeup(waiter: asyncio.Future):
+        if not waiter.done():
+            waiter.set_result(None)
+
+    async def cleanup(self):
+        for fd in (self._reader_fd, self._writer_fd, *self._lock_fds.values()):
+            if fd is not None:
+                os.close(fd)
+        self._reader_fd = self._writer_fd = None
+        self._lock_fds.clear()
+        if self._shm is not None:
+            del self._buf
+            self._shm.close()
+            if self._unlink:
+                if resource_tracker is not None:
+                    # unlink unregisters name in tracker
+                    resource_tracker.register(self._shm._name, 'shared_memory')  # type: ignore
+                self._shm.unlink()
+                for path in self._dir.glob(f'{self._buffer}.*'):
+                    path.unlink()
+            self._shm = None
@@ -1,32 +1,290 @@
 import asyncio
 import collections
 import heapq
-from typing import Any, Deque, List, NamedTuple, Optional, Tuple
+import itertools
+import math
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
-from .base import AbstractQueue, ScoreQueueMixin
+from .base import AbstractQueue, BackpressureMixin, ScoreQueueMixin
 
 
 class Item(NamedTuple):
-    value: Any
+    """
+    Ordered natively as tuple by timestamp, then by seq
+    which is unique in queue so values are never compared
+    """
+
     timestamp: float
-    scheduled: bool = False
+    seq: int
+    value: Any
+
+
+class HeapBackend:
+    """Binary heap of items ordered by timestamp"""
+
+    def __init__(self):
+        self._heap: List[Item] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, item: Item):
+        heapq.heappush(self._heap, item)
+
+    def extend(self, items: List[Item]):
+        if len(items) < len(self._heap) // 8:
+            for item in items:
+                heapq.heappush(self._heap, item)
+        else:
+            self._heap.extend(items)
+            heapq.heapify(self._heap)
+
+    def pop(self, now: float) -> Optional[Item]:
+        if self._heap and self._heap[0].timestamp <= now:
+            return heapq.heappop(self._heap)
+        return None
+
+    def next_time(self) -> Optional[float]:
+        if self._heap:
+            return self._heap[0].timestamp
+        return None
+
+
+class WheelBackend:
+    """
+    Items scheduled in future are appended to buckets by resolution
+    without ordering, due bucket moves to heap of ready items.
+    Item can be released later on resolution but never early.
+    """
+
+    def __init__(self, resolution: float, clock: Callable[[], float]):
+        self._resolution = resolution
+        self._clock = clock
+        self._ready = HeapBackend()
+        self._buckets: Dict[int, List[Item]] = {}
+        self._keys: List[int] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._ready) + self._size
+
+    def push(self, item: Item):
+        timestamp = item.timestamp
+        if timestamp <= self._clock():
+            self._ready.push(item)
+            return
+        key = math.ceil(timestamp / self._resolution)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [item]
+            heapq.heappush(self._keys, key)
+        else:
+            bucket.append(item)
+        self._size += 1
+
+    def extend(self, items: List[Item]):
+        for item in items:
+            self.push(item)
+
+    def _advance(self, now: float):
+        keys = self._keys
+        while keys and keys[0] * self._resolution <= now:
+            bucket = self._buckets.pop(heapq.heappop(keys))
+            self._size -= len(bucket)
+            self._ready.extend(bucket)
+
+    def pop(self, now: float) -> Optional[Item]:
+        self._advance(now)
+        return self._ready.pop(now)
+
+    def next_time(self) -> Optional[float]:
+        result = self._ready.next_time()
+        if result is None and self._keys:
+            result = self._keys[0] * self._resolution
+        return result
+
+
+class IndexedHeapBackend(HeapBackend):
+    """
+    Binary heap with position of each value, push of a stored value
+    moves it in place so heap contains only unique values
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._index: Dict[Any, int] = {}
+
+    def __contains__(self, value) -> bool:
+        return value in self._index
+
+    def _sift_up(self, pos: int, item: Item):
+        heap = self._heap
+        index = self._index
+        while pos > 0:
+            parent_pos = (pos - 1) >> 1
+            parent = heap[parent_pos]
+            if not item < parent:
+                break
+            heap[pos] = parent
+            index[parent.value] = pos
+            pos = parent_pos
+        heap[pos] = item
+        index[item.value] = pos
+
+    def _sift_down(self, pos: int, item: Item):
+        heap = self._heap
+        index = self._index
+        size = len(heap)
+        child_pos = 2 * pos + 1
+        while child_pos < size:
+            right_pos = child_pos + 1
+            if right_pos < size and heap[right_pos] < heap[child_pos]:
+                child_pos = right_pos
+            child = heap[child_pos]
+            if not child < item:
+                break
+            heap[pos] = child
+            index[child.value] = pos
+            pos = child_pos
+            child_pos = 2 * pos + 1
+        heap[pos] = item
+        index[item.value] = pos
+
+    def push(self, item: Item):
+        pos = self._index.get(item.value)
+        if pos is None:
+            self._heap.append(item)
+            self._sift_up(len(self._heap) - 1, item)
+        elif item < self._heap[pos]:
+            self._sift_up(pos, item)
+        else:
+            self._sift_down(pos, item)
+
+    def extend(self, items: List[Item]):
+        if len(items) < len(self._heap) // 8:
+            for item in items:
+                self.push(item)
+            return
+        heap = self._heap
+        index = self._index
+        for item in items:
+            pos = index.get(item.value)
+            if pos is None:
+                index[item.value] = len(heap)
+                heap.append(item)
+            else:
+                heap[pos] = item
+        heapq.heapify(heap)
+        for pos, item in enumerate(heap):
+            index[item.value] = pos
+
+    def _remove_at(self, pos: int) -> Item:
+        heap = self._heap
+        item = heap[pos]
+        del self._index[item.value]
+        last = heap.pop()
+        if pos < len(heap):
+            if last < item:
+                self._sift_up(pos, last)
+            else:
+                self._sift_down(pos, last)
+        return item
+
+    def pop(self, now: float) -> Optional[Item]:
+        if self._heap and self._heap[0].timestamp <= now:
+            return self._remove_at(0)
+        return None
+
+    def remove(self, value) -> Optional[Item]:
+        pos = self._index.get(value)
+        if pos is None:
+            return None
+        return self._remove_at(pos)
+
+
+class IndexedWheelBackend(WheelBackend):
+    """Wheel with unique values, buckets are mappings by value"""
+
+    _ready: IndexedHeapBackend
+
+    def __init__(self, resolution: float, clock: Callable[[], float]):
+        super().__init__(resolution, clock)
+        self._ready = IndexedHeapBackend()
+        self._buckets: Dict[int, Dict[Any, Item]] = {}  # type: ignore
+        self._bucket_keys: Dict[Any, int] = {}
+
+    def __contains__(self, value) -> bool:
+        return value in self._bucket_keys or value in self._ready
+
+    def push(self, item: Item):
+        self.remove(item.value)
+        timestamp = item.timestamp
+        if timestamp <= self._clock():
+            self._ready.push(item)
+            return
+        key = math.ceil(timestamp / self._resolution)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = {item.value: item}
+            heapq.heappush(self._keys, key)
+        else:
+            bucket[item.value] = item
+        self._bucket_keys[item.value] = key
+        self._size += 1
+
+    def _advance(self, now: float):
+        keys = self._keys
+        while keys and keys[0] * self._resolution <= now:
+            bucket = self._buckets.pop(heapq.heappop(keys))
+            self._size -= len(bucket)
+            for value in bucket:
+                del self._bucket_keys[value]
+            self._ready.extend(list(bucket.values()))
 
-    def __lt__(self, other) -> bool:
-        return self.timestamp < other.timestamp
+    def remove(self, value) -> Optional[Item]:
+        key = self._bucket_keys.pop(value, None)
+        if key is None:
+            return self._ready.remove(value)
+        self._size -= 1
+        return self._buckets[key].pop(value)
 
 
-class TimestampQueue(ScoreQueueMixin, AbstractQueue):
+class TimestampQueue(ScoreQueueMixin, BackpressureMixin, AbstractQueue):
+    """
+    config:
+        add_score: duration added to default score
+        maxsize: int high watermark
+        low: int low watermark, default maxsize - 1
+        backend: [heap|wheel] storage of scheduled items
+        resolution: duration of bucket for wheel backend
+    """
+
     default_score = 'time.time'
     _getters: Deque[Tuple[bool, asyncio.Future]]
     _putters: Deque[asyncio.Future]
-    _queue: List
+    _queue: Any
+    _timer: Optional[asyncio.TimerHandle] = None
+    _timer_at: float = 0
 
-    def __init__(self, *args, add_score: float = 0, maxsize: int = 0, **kwargs):
-        self._queue = []
+    def __init__(
+        self,
+        *args,
+        add_score: float = 0,
+        maxsize: int = 0,
+        low: Optional[int] = None,
+        backend: str = 'heap',
+        resolution: float = 0.1,
+        **kwargs,
+    ):
         self._getters = collections.deque()
         self._putters = collections.deque()
+        self._seq = itertools.count()
         self._add_score = add_score
         self._maxsize = maxsize
+        self._low = low
+        self._backend = backend
+        self._resolution = resolution
+        self._queue = self._create_backend()
         super().__init__(*args, **kwargs)
 
     def set_config(self, config):
@@ -41,12 +299,30 @@ class TimestampQueue(ScoreQueueMixin, AbstractQueue):
             null=True,
             default=0,
         )
+        self._low = self.config.get_int('low', null=True, default=None)
+        self._backend = self.config.get('backend', self._backend)
+        self._resolution = self.config.get_duration(
+            'resolution',
+            default=self._resolution,
+        )
+        if not self._queue:
+            self._queue = self._create_backend()
+
+    def _create_backend(self):
+        if self._backend == 'heap':
+            return HeapBackend()
+        elif self._backend == 'wheel':
+            return WheelBackend(self._resolution, self._loop_time)
+        raise ValueError(f'Unknown backend {self._backend}')
 
     def set_context(self, context):
         context.on_cleanup.append(self.cleanup)
         return super().set_context(context)
 
     async def cleanup(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
         while self._getters:
             i = self._getters.popleft()[-1]
             if not i.done():
@@ -70,38 +346,61 @@ class TimestampQueue(ScoreQueueMixin, AbstractQueue):
     def empty(self) -> bool:
         return not self._queue
 
-    def full(self) -> bool:
-        if 0 >= self._maxsize:
-            return False
-        return len(self) >= self._maxsize
-
-    def _schedule(self, item: Item):
-        if item.scheduled:
-            self._put(item)
-        else:
-            item = Item(value=item.value, timestamp=item.timestamp, scheduled=True)
-            self._put(item)
-            self._min_timestamp = item.timestamp
-            self._loop.call_at(item.timestamp - self._base_timestamp, self._on_time)
+    def _call_at(self, timestamp: Optional[float]):
+        if timestamp is None:
+            return
+        elif self._timer is not None:
+            if self._timer_at <= timestamp:
+                return
+            self._timer.cancel()
+        self._timer_at = timestamp
+        self._timer = self._loop.call_at(timestamp - self._base_timestamp, self._on_time)
 
     async def get(self, score: bool = False, *, timeout: Optional[float] = None):
         item = self._pop()
-        if item is None:
-            pass
-        elif item.timestamp > self._loop_time():
-            self._schedule(item)
-        else:
-            self._release_putter()
+        if item is not None:
+            self._release_putters()
             if score:
                 return item.value, item.timestamp
             else:
                 return item.value
         waiter = self.loop.create_future()
         self._getters.append((score, waiter))
+        self._call_at(self._next_time())
         if timeout:
             self._loop.call_later(timeout, self._on_timeout, waiter, timeout)
         return await waiter
 
+    async def get_many(
+        self,
+        max_items: int,
+        score: bool = False,
+        *,
+        timeout: Optional[float] = None,
+    ) -> List:
+        items = self._pop_ready(max_items)
+        if items:
+            self._release_putters()
+        else:
+            value, timestamp = await self.get(score=True, timeout=timeout)
+            items = [Item(timestamp, 0, value)]
+            if max_items > 1:
+                items.extend(self._pop_ready(max_items - 1))
+                self._release_putters()
+        if score:
+            return [(i.value, i.timestamp) for i in items]
+        else:
+            return [i.value for i in items]
+
+    def _pop_ready(self, max_items: int) -> List[Item]:
+        result: List[Item] = []
+        while len(result) < max_items:
+            item = self._pop()
+            if item is None:
+                break
+            result.append(item)
+        return result
+
     def _on_timeout(self, waiter: asyncio.Future, timeout: float):
         if not waiter.done():
             waiter.set_exception(asyncio.TimeoutError(timeout))
@@ -115,73 +414,90 @@ class TimestampQueue(ScoreQueueMixin, AbstractQueue):
                 f.set_result((item.value, item.timestamp))
             else:
                 f.set_result(item.value)
-            self._release_putter()
+            self._release_putters()
             return True
         return False
 
     def _pop(self) -> Optional[Item]:
-        if self._queue:
-            return heapq.heappop(self._queue)
-        else:
-            return None
+        return self._queue.pop(self._loop_time())
+
+    def _next_time(self) -> Optional[float]:
+        return self._queue.next_time()
 
     def _put(self, item: Item):
-        heapq.heappush(self._queue, item)
+        self._queue.push(item)
+
+    def _put_many(self, items: List[Item]):
+        self._queue.extend(items)
 
     async def put(self, value, score=None):
+        if self._putters or self.full():
+            await self._wait_putter()
         if score is None:
             score = self._default_score() + self._add_score
-        item = Item(value=value, timestamp=score)
+        item = Item(score, next(self._seq), value)
+        if self._getters and score <= self._loop_time() and self._send(item):
+            return
+        self._put(item)
         if self._getters:
-            if score < self._loop_time():
-                if self._send(item):
-                    return
-                else:
-                    self._put(item)
-            else:
-                self._schedule(item)
-        else:
-            self._put(item)
-        if self.full():
-            waiter = self.loop.create_future()
-            self._putters.append(waiter)
-            await waiter
+            self._call_at(self._next_time())
 
-    def _release_putter(self):
-        if not self.full():
-            while self._putters:
-                self._putters.popleft().set_result(None)
+    async def put_many(self, values: Iterable, score=None):
+        values = list(values)
+        while values:
+            if self._putters or self.full():
+                await self._wait_putter()
+            if score is None:
+                score = self._default_score() + self._add_score
+            n = len(values)
+            if self._maxsize and self._maxsize > 0:
+                # no more than free slots, the rest waits again
+                n = max(self._maxsize - len(self) - self._granted, 1)
+            seq = self._seq
+            self._put_many([Item(score, next(seq), v) for v in values[:n]])
+            del values[:n]
+            if self._getters:
+                self._wakeup()
 
     def _on_time(self):
+        self._timer = None
+        self._wakeup()
+
+    def _wakeup(self):
         while self._getters:
             item = self._pop()
-            if not item:
-                break
-            elif item.timestamp > self._loop_time():
-                self._schedule(item)
+            if item is None:
                 break
             elif not self._send(item):
                 self._put(item)
+        if self._getters:
+            self._call_at(self._next_time())
 
 
 class UniqueQueue(TimestampQueue):
-    def __init__(self, *args, **kwargs):
-        self._values = {}
-        super().__init__(*args, **kwargs)
+    """
+    Queue of unique values, put of a stored value reschedules it
+    """
 
-    def _pop(self) -> Optional[Item]:
-        while self._queue:
-            item = heapq.heappop(self._queue)
-            if item is self._values.get(item.value):
-                return self._values.pop(item.value)
-        return None
+    def _create_backend(self):
+        if self._backend == 'heap':
+            return IndexedHeapBackend()
+        elif self._backend == 'wheel':
+            return IndexedWheelBackend(self._resolution, self._loop_time)
+        raise ValueError(f'Unknown backend {self._backend}')
 
-    def _put(self, item: Item):
-        super()._put(item)
-        self._values[item.value] = item
+    def __contains__(self, value) -> bool:
+        return value in self._queue
 
-    def __len__(self) -> int:
-        return len(self._values)
+    def reschedule(self, value, score: float):
+        if value not in self._queue:
+            raise KeyError(value)
+        self._put(Item(score, next(self._seq), value))
+        if self._getters:
+            self._wakeup()
 
-    def empty(self) -> bool:
-        return not self._values
+    def remove(self, value) -> bool:
+        if self._queue.remove(value) is None:
+            return False
+        self._release_putters()
+        return True
@@ -144,6 +144,11 @@ def load_from_fd(fd):
     return pickle.loads(d)
 
 
+def load_from_path(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
 def dump_to_fd(fd, data):
     buf = pickle.dumps(data)
     fd.write(SIZE.pack(len(buf)))
@@ -1,13 +1,40 @@
 import asyncio
 import collections
 import datetime
+import inspect
+import random
+import time
+import uuid
 from abc import abstractmethod
 from functools import partial
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from ..core.base import AbstractNamedEntity, LoggingEntity, link
+from ..core.metrics import Histogram, Meter
 from ..queue.base import AbstractQueue
+from ..storage.base import AbstractStorageWriteOnly
 from ..utils import import_name
+from .scheduler import Scheduler, crontab
+
+
+class Failed:
+    """Item of input failed in run with count of attempts and last error"""
+
+    __slots__ = ('value', 'attempt', 'error')
+
+    def __init__(self, value: Any, attempt: int, error: str):
+        self.value = value
+        self.attempt = attempt
+        self.error = error
+
+    def __getstate__(self):
+        return self.value, self.attempt, self.error
+
+    def __setstate__(self, state):
+        self.value, self.attempt, self.error = state
+
+    def __repr__(self):
+        return f'Failed({self.value!r}, attempt={self.attempt}, error={self.error})'
 
 
 class AbstractWorker(LoggingEntity, AbstractNamedEntity):
@@ -34,8 +61,30 @@ class Worker(AbstractWorker):
         sleep: int time in seconds for sleep between rerun
         sleep_start: int time in seconds for sleep before run
         crontab: str rule as cron. Every 5 minutes "*/5 * * * *"
-        input: str.path to instance of AbstractReader
+        scheduler: str.path to Scheduler, timer of it is used
+            for crontab and sleep instead of own sleep
+        catchup: [skip|coalesce|all] policy of ticks missed while run,
+            default policy of scheduler
+        jitter: duration max random delay of crontab tick with scheduler
+        retries: int count of retries of failed item from input, default 0
+        retry_delay: duration of first retry, doubled on each next, default 1s
+        retry_max_delay: duration limit of retry delay, default 5m
+        retry_jitter: float part of delay randomly cut, default 0.5
+        retry_queue: str.path to queue with score to put item for retry
+            as Failed with score of time to run, default input
+        dead_letter: str.path to queue for Failed items exhausted retries
+        drain: duration to finish items in flight on stop of context,
+            input is not read while draining, items not finished
+            until deadline are cancelled and handed off
+        handoff: str.path to queue or storage for items handed off,
+            default input
+        input: str.path to instance of AbstractReader,
+            worker stops when input raises EOFError
         output: str.path to instance of AbstractWriter
+        batch: int max count of items from input passed to run as list,
+            run should return iterable of results for output
+        concurrency: int max count of run in flight
+        ordered: bool keep order of results in output with concurrency
     """
 
     counter: Dict
@@ -47,20 +96,37 @@ class Worker(AbstractWorker):
     _is_sleep = None
     _future = None
     _persist = False
+    _batch = 0
+    _concurrency = 1
+    _ordered = False
+    _retries = 0
+    _drain: Optional[float] = None
+    _draining = False
+    _eof = False
+    _supervised = False
+    _semaphore: asyncio.Semaphore
+    _tasks: Set[asyncio.Task]
+    _last_task: Optional[asyncio.Task] = None
 
     input: Optional[AbstractQueue] = link(nullable=True)
     output: Optional[AbstractQueue] = link(nullable=True)
+    scheduler: Optional[Scheduler] = link(nullable=True)
+    retry_queue: Optional[AbstractQueue] = link(nullable=True)
+    dead_letter: Optional[AbstractQueue] = link(nullable=True)
+    handoff: Optional[Union[AbstractQueue, AbstractStorageWriteOnly]] = link(nullable=True)
 
     def __init__(self, *args, **kwargs):
         self.counter = collections.Counter()
+        self._tasks = set()
+        self._timing = {'get': Histogram(), 'run': Histogram(), 'put': Histogram()}
+        self._rates = {'done': Meter(), 'error': Meter()}
         super().__init__(*args, **kwargs)
 
     def set_config(self, config):
         super().set_config(config)
-        crontab = self.config.get('crontab')
-        if crontab:
-            CronTab = import_name('crontab.CronTab')
-            self._crontab = CronTab(crontab)
+        rule = self.config.get('crontab')
+        if rule:
+            self._crontab = crontab(rule)
 
         self._sleep = self.config.get_duration(
             'sleep',
@@ -68,9 +134,23 @@ class Worker(AbstractWorker):
             null=True,
         )
         self._sleep_start = self.config.get_duration("sleep_start", default=None, null=True)
+        self._batch = self.config.get_int('batch', default=0)
+        self._concurrency = self.config.get_int('concurrency', default=1)
+        self._ordered = self.config.get_bool('ordered', default=False)
+        self._retries = self.config.get_int('retries', default=0)
+        self._retry_delay = self.config.get_duration('retry_delay', default=1)
+        self._retry_max_delay = self.config.get_duration('retry_max_delay', default=300)
+        self._retry_jitter = self.config.get_float('retry_jitter', default=0.5)
+        self._drain = self.config.get_duration('drain', default=None, null=True)
 
     async def init(self):
         await super().init()
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+        if self._retries and self.input is not None:
+            queue = self.retry_queue or self.input
+            params = inspect.signature(queue.put).parameters.values()
+            if not any(p.name == 'score' or p.kind is p.VAR_KEYWORD for p in params):
+                raise TypeError(f'Retry queue of {self.name} should accept score, got {type(queue).__name__}')
 
         if self.config.get('run'):
             run = import_name(self.config.run)
@@ -83,49 +163,197 @@ class Worker(AbstractWorker):
         else:
             self._persist = self.config.get('persist')
 
+        if self._supervised:
+            return  # started, stopped and drained by supervisor
         groups = self.config.get('groups')
         if self.config.get('autorun'):
             self.context.on_start.append(self.start, groups)
         self.context.on_stop.append(self.stop, groups)
+        if self._drain is not None:
+            self.context.on_drain.append(self.drain, groups)
 
-    async def work(self):
-        self._is_sleep = False
-        if self.input is not None:
-            args: Tuple[Any, ...] = (await self.input.get(),)
+    async def get_args(self) -> Tuple[Any, ...]:
+        if self.input is None:
+            return ()
+        started = time.perf_counter()
+        try:
+            if self._batch:
+                args = (await self.input.get_many(self._batch),)
+            else:
+                args = (await self.input.get(),)
+        except EOFError:
+            self._eof = True
+            raise
+        self._timing['get'].record(time.perf_counter() - started)
+        return args
+
+    async def put_result(self, result: Any):
+        if self.output is None:
+            return
+        started = time.perf_counter()
+        if self._batch and self.input is not None:
+            if result is not None:
+                await self.output.put_many(result)
         else:
-            args = ()
+            await self.output.put(result)
+        self._timing['put'].record(time.perf_counter() - started)
+
+    async def _run(self, args: Tuple[Any, ...]) -> Any:
         self.counter['run'] += 1
-        result = await self.run(*args)
+        started = time.perf_counter()
+        if self._retries and self.input is not None:
+            args, attempts = self._unwrap(args)
+            try:
+                result = await self.run(*args)
+            except Exception as e:
+                await self._retry(args, attempts, e)
+                raise
+        else:
+            result = await self.run(*args)
+        self._timing['run'].record(time.perf_counter() - started)
         self.counter['done'] += 1
-        if self.output is not None:
-            await self.output.put(result)
+        self._rates['done'].mark()
+        return result
+
+    def _unwrap(self, args: Tuple[Any, ...]) -> Tuple[Tuple[Any, ...], List[int]]:
+        if self._batch:
+            items = args[0]
+        else:
+            items = args
+        attempts = [i.attempt if isinstance(i, Failed) else 0 for i in items]
+        if any(attempts):
+            values = [i.value if isinstance(i, Failed) else i for i in items]
+            args = (values,) if self._batch else tuple(values)
+        return args, attempts
+
+    async def _retry(self, args: Tuple[Any, ...], attempts: List[int], exc: Exception):
+        """Puts failed items to retry queue without waiting of delay"""
+        queue = self.retry_queue or self.input
+        assert queue is not None
+        values = args[0] if self._batch else args
+        now = time.time()
+        for value, attempt in zip(values, attempts):
+            item = Failed(value, attempt + 1, repr(exc))
+            if attempt < self._retries:
+                delay = min(self._retry_delay * 2**attempt, self._retry_max_delay)
+                delay *= 1 - self._retry_jitter * random.random()
+                await queue.put(item, score=now + delay)  # type: ignore[call-arg]
+                self.counter['retry'] += 1
+            else:
+                self.counter['dead'] += 1
+                if self.dead_letter is not None:
+                    await self.dead_letter.put(item)
+
+    async def work(self):
+        args = await self.get_args()
+        self._is_sleep = False
+        try:
+            result = await self._run(args)
+            await self.put_result(result)
+        except asyncio.CancelledError:
+            if self._draining:
+                await self._handoff(args)
+            raise
+
+    async def _handoff(self, args: Tuple[Any, ...]):
+        """Returns items of args to handoff or input"""
+        if self.input is None:
+            return
+        target = self.handoff or self.input
+        items = args[0] if self._batch else args
+        for item in items:
+            if isinstance(target, AbstractStorageWriteOnly):
+                await target.set(f'{self.name}.{uuid.uuid4().hex}', item)
+            else:
+                await target.put(item)
+            self.counter['handoff'] += 1
+
+    def _log_error(self):
+        self.counter['error'] += 1
+        self._rates['error'].mark()
+        self.logger.exception(
+            'ERROR {} {}'.format(
+                self.name,
+                self.config.get('run', type(self)),
+            )
+        )
+
+    async def _spawn(self):
+        await self._semaphore.acquire()
+        try:
+            args = await self.get_args()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        task = self.loop.create_task(self._work_task(args, self._last_task))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if self._ordered:
+            self._last_task = task
+
+    async def _work_task(self, args: Tuple[Any, ...], previous: Optional[asyncio.Task]):
+        try:
+            result = await self._run(args)
+            if previous is not None and not previous.done():
+                await asyncio.wait([previous])
+            await self.put_result(result)
+        except asyncio.CancelledError:
+            if self._draining:
+                await self._handoff(args)
+            raise
+        except BaseException:
+            self._log_error()
+        finally:
+            self._semaphore.release()
+
+    async def _sleep_for(self, delay: float):
+        if self.scheduler is not None:
+            await self.scheduler.sleep(delay)
+        else:
+            await asyncio.sleep(delay)
 
     async def runner(self):
         self._is_sleep = True
+        self._eof = False
+        subscription = None
+        if self._crontab is not None and self.scheduler is not None:
+            subscription = self.scheduler.subscribe(
+                self.name,
+                self.config.crontab,
+                policy=self.config.get('catchup'),
+                jitter=self.config.get_duration('jitter', default=None, null=True),
+            )
         try:
             if self._sleep_start:
-                await asyncio.sleep(self._sleep_start)
+                await self._sleep_for(self._sleep_start)
             while True:
-                if self._crontab is not None:
+                if subscription is not None:
+                    await subscription.wait()
+                elif self._crontab is not None:
                     await asyncio.sleep(self._crontab.next(default_utc=True))
                 try:
-                    await self.work()
+                    if self._concurrency > 1:
+                        await self._spawn()
+                    else:
+                        await self.work()
                 except asyncio.CancelledError:
                     raise
+                except EOFError:
+                    if self._eof:
+                        break
+                    self._log_error()
                 except BaseException:
-                    self.counter['error'] += 1
-                    self.logger.exception(
-                        'ERROR {} {}'.format(
-                            self.name,
-                            self.config.get('run', type(self)),
-                        )
-                    )
+                    self._log_error()
                 self._is_sleep = True
                 if not self._persist:
-                    return
+                    break
                 if self._sleep:
-                    await asyncio.sleep(self._sleep)
+                    await self._sleep_for(self._sleep)
+            if self._tasks:
+                await asyncio.wait(self._tasks)
         finally:
+            if subscription is not None:
+                subscription.scheduler.unsubscribe(subscription.name)
             self._stopped_at = datetime.datetime.now()
 
     async def run(self, value: Any = None) -> Any:  # type: ignore
@@ -160,6 +388,9 @@ class Worker(AbstractWorker):
             self._future = self.loop.create_task(self.runner())
 
     async def stop(self, force=True):
+        if force:
+            for task in self._tasks:
+                task.cancel()
         if not self.running():
             pass
         elif force or self._is_sleep:
@@ -176,13 +407,59 @@ class Worker(AbstractWorker):
                 await self._future
             except asyncio.CancelledError:
                 pass
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+        self._last_task = None
+        self._is_sleep = None
+
+    async def drain(self, timeout: Optional[float] = None):
+        """
+        Stops reading of input, waits items in flight until timeout,
+        then cancels them and hands off their items
+        """
+        if timeout is None:
+            timeout = self._drain
+        self._draining = True
+        try:
+            if self.running():
+                self._persist = False
+                if self._is_sleep:
+                    assert self._future
+                    self._future.cancel()
+            futures = [f for f in (self._future, *self._tasks) if f is not None and not f.done()]
+            if futures:
+                _, pending = await asyncio.wait(futures, timeout=timeout)
+                for f in pending:
+                    f.cancel()
+                if pending:
+                    await asyncio.wait(pending)
+        finally:
+            self._draining = False
+        self._last_task = None
         self._is_sleep = None
 
     async def status(self):
-        return {
+        """
+        Counters, timing of get, run and put with quantiles in seconds
+        and rates per second of done and error
+        """
+        result = {
             'started_at': self.started_at,
             'stopped_at': self.stopped_at,
             'running': self.running(),
             'is_sleep': self._is_sleep,
+            'in_flight': len(self._tasks),
             **self.counter,
+            'timing': {k: v.summary() for k, v in self._timing.items()},
+            'rate': {k: v.rates() for k, v in self._rates.items()},
         }
+        for key, queue in (('input', self.input), ('output', self.output)):
+            metrics = getattr(queue, 'metrics', None)
+            value = metrics() if metrics is not None else None
+            if value is not None:
+                result[key] = value
+        if self.scheduler is not None:
+            schedule = self.scheduler.stats().get(self.name)
+            if schedule is not None:
+                result['schedule'] = schedule
+        return result
@@ -0,0 +1,96 @@
+import bisect
+import hashlib
+import itertools
+import random
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from ..utils import import_name
+
+
+class Dispatcher:
+    """
+    Chooses child of supervisor for call,
+    update is called on each change of children.
+    """
+
+    def __init__(self, in_flight: Mapping[str, int], config: Mapping):
+        self._in_flight = in_flight
+        self._config = config
+        self._names: List[str] = []
+
+    def update(self, names: Sequence[str]):
+        self._names = list(names)
+
+    def choose(self, args: Tuple, kwargs: Dict[str, Any]) -> str:
+        raise NotImplementedError()
+
+
+class RandomDispatcher(Dispatcher):
+    def choose(self, args, kwargs) -> str:
+        return random.choice(self._names)
+
+
+class RoundRobinDispatcher(Dispatcher):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._counter = itertools.count()
+
+    def choose(self, args, kwargs) -> str:
+        return self._names[next(self._counter) % len(self._names)]
+
+
+class LeastInFlightDispatcher(Dispatcher):
+    """Power of two random choices by count of calls in flight"""
+
+    def choose(self, args, kwargs) -> str:
+        names = self._names
+        if len(names) == 1:
+            return names[0]
+        a, b = random.sample(names, 2)
+        if self._in_flight.get(b, 0) < self._in_flight.get(a, 0):
+            return b
+        return a
+
+
+class HashDispatcher(Dispatcher):
+    """
+    Consistent hashing of key of call,
+    key is first argument or result of dispatch_key.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        key = self._config.get('dispatch_key')
+        self._key: Optional[Callable] = import_name(key) if key else None
+        self._replicas = int(self._config.get('replicas', 100))
+        self._hashes: List[int] = []
+        self._ring: List[str] = []
+
+    @staticmethod
+    def hash(value: Any) -> int:
+        data = value if isinstance(value, bytes) else str(value).encode()
+        return int.from_bytes(hashlib.md5(data).digest()[:8], 'big')
+
+    def update(self, names: Sequence[str]):
+        super().update(names)
+        ring = sorted((self.hash(f'{name}#{i}'), name) for name in names for i in range(self._replicas))
+        self._hashes = [h for h, _ in ring]
+        self._ring = [name for _, name in ring]
+
+    def choose(self, args, kwargs) -> str:
+        if self._key is not None:
+            key = self._key(*args, **kwargs)
+        elif args:
+            key = args[0]
+        else:
+            key = next(iter(kwargs.values()), None)
+        i = bisect.bisect(self._hashes, self.hash(key))
+        return self._ring[i % len(self._ring)]
+
+
+DISPATCHERS = {
+    'random': RandomDispatcher,
+    'round_robin': RoundRobinDispatcher,
+    'least': LeastInFlightDispatcher,
+    'hash': HashDispatcher,
+}
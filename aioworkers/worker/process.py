@@ -0,0 +1,295 @@
+import asyncio
+import inspect
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+import struct
+import threading
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Optional, Set
+
+from ..utils import import_name
+from .base import Worker
+
+logger = logging.getLogger(__name__)
+HEADER = struct.Struct('!QBI')  # tag, ok, count of out-of-band buffers
+PING = 0  # tag of liveness check, with not ok asks child to exit, calls are tagged from 1
+
+
+def send(conn: Connection, tag: int, ok: bool, value: Any):
+    """Sends value pickled by protocol 5 with out-of-band buffers"""
+    buffers: List[pickle.PickleBuffer] = []
+    data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+    conn.send_bytes(HEADER.pack(tag, ok, len(buffers)) + data)
+    for buffer in buffers:
+        conn.send_bytes(buffer.raw())
+
+
+def recv(conn: Connection):
+    message = conn.recv_bytes()
+    tag, ok, count = HEADER.unpack_from(message)
+    buffers = [conn.recv_bytes() for _ in range(count)]
+    value = pickle.loads(memoryview(message)[HEADER.size :], buffers=buffers)
+    return tag, ok, value
+
+
+def reply(conn: Connection, lock: threading.Lock, tag: int, ok: bool, value: Any):
+    with lock:
+        try:
+            send(conn, tag, ok, value)
+        except Exception:
+            if ok:
+                raise
+            send(conn, tag, False, RuntimeError(repr(value)))
+
+
+def child_reader(conn: Connection, lock: threading.Lock, calls: queue.Queue):
+    """Receives calls for main thread of child, answers pings while call runs"""
+    try:
+        while True:
+            tag, ok, value = recv(conn)
+            if tag != PING:
+                calls.put((tag, value))
+            elif ok:
+                reply(conn, lock, PING, True, None)
+            else:
+                break
+    except (EOFError, OSError):
+        pass
+    calls.put(None)
+
+
+def child_main(conn: Connection, target: str):
+    """Loop of child process calls target for each received value"""
+    func = import_name(target)
+    lock = threading.Lock()
+    calls: queue.Queue = queue.Queue()
+    threading.Thread(target=child_reader, args=(conn, lock, calls), daemon=True).start()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        while True:
+            call = calls.get()
+            if call is None:
+                break
+            tag, value = call
+            try:
+                result = func(value)
+                if inspect.isawaitable(result):
+                    result = loop.run_until_complete(result)
+            except Exception as e:
+                reply(conn, lock, tag, False, e)
+            else:
+                reply(conn, lock, tag, True, result)
+    finally:
+        loop.close()
+        conn.close()
+
+
+class ChildProcess:
+    def __init__(self, name: str, process, conn: Connection):
+        self.name = name
+        self.process = process
+        self.conn = conn
+        self.future: Optional[asyncio.Future] = None
+        self.tag = PING
+        self.seen = 0.0
+        self.thread: Optional[threading.Thread] = None
+
+
+class ProcessSupervisor(Worker):
+    """
+    Worker which runs target in child processes,
+    values from input are sent to idle child and results go to output.
+    Crashed, timed out or not responding child is restarted.
+    Results are received by thread per child, so loop is not blocked
+    by large values.
+    config:
+        target: str.path to function of value called in child, may be coroutine
+        processes: int count of child processes, default count of cpu
+        start_method: [spawn|forkserver|fork], default spawn
+        timeout: duration limit of call, child is killed on timeout
+        ping: duration between liveness checks, default 5s, 0 disables
+        ping_timeout: duration without answer to ping to restart child,
+            default 10s, pings are answered by thread while call runs
+        concurrency: int, default processes
+    """
+
+    _timeout: Optional[float] = None
+    _checker: Optional[asyncio.Task] = None
+
+    def __init__(self, *args, **kwargs):
+        self._processes: Dict[str, ChildProcess] = {}
+        self._reaping: Set[asyncio.Future] = set()
+        self._restarts = 0
+        super().__init__(*args, **kwargs)
+
+    def set_config(self, config):
+        super().set_config(config)
+        self._target = self.config.get('target')
+        self._count = self.config.get_int('processes', default=os.cpu_count() or 1)
+        self._mp = multiprocessing.get_context(self.config.get('start_method', 'spawn'))
+        self._timeout = self.config.get_duration('timeout', default=None, null=True)
+        self._ping = self.config.get_duration('ping', default=5)
+        self._ping_timeout = self.config.get_duration('ping_timeout', default=10)
+        if not self.config.get('concurrency'):
+            self._concurrency = self._count
+
+    async def init(self):
+        await super().init()
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self.context.on_cleanup.append(self.cleanup)
+        for i in range(self._count):
+            self._spawn_process('process' + str(i))
+        if self._ping:
+            self._checker = self.loop.create_task(self._check())
+
+    def _spawn_process(self, name: str):
+        parent, child = self._mp.Pipe()
+        process = self._mp.Process(
+            target=child_main,
+            args=(child, self._target),
+            name=f'{self.name}.{name}',
+            daemon=True,
+        )
+        process.start()
+        child.close()
+        handle = ChildProcess(name, process, parent)
+        handle.seen = self.loop.time()
+        handle.thread = threading.Thread(
+            target=self._reader,
+            args=(handle,),
+            name=f'{process.name}.reader',
+            daemon=True,
+        )
+        handle.thread.start()
+        self._processes[name] = handle
+        self._idle.put_nowait(handle)
+
+    def _reader(self, handle: ChildProcess):
+        """Receives messages of child in thread until end of pipe"""
+        while True:
+            try:
+                tag, ok, value = recv(handle.conn)
+            except (EOFError, OSError):
+                error: Optional[Exception] = RuntimeError(f'Process {handle.process.name} died')
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            try:
+                if error is None:
+                    self.loop.call_soon_threadsafe(self._on_message, handle, tag, ok, value)
+                else:
+                    self.loop.call_soon_threadsafe(self._restart, handle, error)
+                    return
+            except RuntimeError:  # loop closed
+                return
+
+    def _on_message(self, handle: ChildProcess, tag: int, ok: bool, value: Any):
+        handle.seen = self.loop.time()
+        f = handle.future
+        if tag == PING or f is None or f.done() or tag != handle.tag:
+            return
+        elif ok:
+            f.set_result(value)
+        else:
+            f.set_exception(value)
+
+    async def _check(self):
+        """Restarts children which died or do not answer to ping"""
+        while True:
+            await asyncio.sleep(self._ping)
+            now = self.loop.time()
+            for handle in list(self._processes.values()):
+                if not handle.process.is_alive():
+                    self._restart(handle, RuntimeError(f'Process {handle.process.name} died'))
+                elif now - handle.seen > self._ping + self._ping_timeout:
+                    self._restart(handle, RuntimeError(f'Process {handle.process.name} is not responding'))
+                else:
+                    try:
+                        send(handle.conn, PING, True, None)
+                    except OSError as e:
+                        self._restart(handle, e)
+
+    def _restart(self, handle: ChildProcess, exc: BaseException):
+        if self._processes.get(handle.name) is not handle:
+            return
+        del self._processes[handle.name]
+        if handle.process.is_alive():
+            handle.process.kill()
+        if handle.future is not None and not handle.future.done():
+            handle.future.set_exception(exc)
+        self._restarts += 1
+        logger.warning('Restart process %s: %s', handle.process.name, exc)
+        self._reap(handle)
+        self._spawn_process(handle.name)
+
+    def _reap(self, handle: ChildProcess, timeout: Optional[float] = None):
+        """Joins process and reader thread in executor"""
+        future = self.loop.run_in_executor(None, self._join, handle, timeout)
+        self._reaping.add(future)
+        future.add_done_callback(self._reaping.discard)
+
+    @staticmethod
+    def _join(handle: ChildProcess, timeout: Optional[float] = None):
+        handle.process.join(timeout)
+        if handle.process.is_alive():
+            handle.process.kill()
+            handle.process.join()
+        if handle.thread is not None:
+            handle.thread.join()
+        handle.conn.close()
+
+    async def run(self, value: Any = None) -> Any:  # type: ignore
+        while True:
+            handle = await self._idle.get()
+            if self._processes.get(handle.name) is handle:
+                break
+        handle.tag += 1
+        handle.future = future = self.loop.create_future()
+        try:
+            send(handle.conn, handle.tag, True, value)
+            if self._timeout:
+                return await asyncio.wait_for(asyncio.shield(future), self._timeout)
+            return await future
+        except asyncio.TimeoutError:
+            future.cancel()
+            self._restart(handle, asyncio.TimeoutError(self._timeout))
+            raise
+        except (EOFError, OSError) as e:
+            self._restart(handle, e)
+            raise
+        finally:
+            handle.future = None
+            if self._processes.get(handle.name) is handle:
+                self._idle.put_nowait(handle)
+
+    async def cleanup(self):
+        if self._checker is not None:
+            self._checker.cancel()
+            self._checker = None
+        processes, self._processes = self._processes, {}
+        for handle in processes.values():
+            try:
+                send(handle.conn, PING, False, None)
+            except OSError:
+                pass
+            self._reap(handle, 1)
+        if self._reaping:
+            await asyncio.wait(self._reaping)
+
+    async def status(self):
+        status = await super().status()
+        status['processes'] = {
+            name: {
+                'pid': handle.process.pid,
+                'alive': handle.process.is_alive(),
+                'busy': handle.future is not None,
+            }
+            for name, handle in self._processes.items()
+        }
+        status['restarts'] = self._restarts
+        return status
@@ -0,0 +1,204 @@
+import asyncio
+import collections
+import datetime
+import functools
+import heapq
+import itertools
+import random
+import time
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ..core.base import AbstractNamedEntity
+from ..core.metrics import Histogram
+from ..utils import import_name
+
+POLICIES = ('skip', 'coalesce', 'all')
+
+
+@functools.lru_cache(None)
+def crontab(rule: str):
+    return import_name('crontab.CronTab')(rule)
+
+
+class Subscription:
+    """
+    Ticks of crontab rule for one subscriber,
+    due time is counted from previous due time so run does not drift it.
+    """
+
+    def __init__(self, scheduler: 'Scheduler', name: str, rule: str, policy: str, jitter: float):
+        if policy not in POLICIES:
+            raise ValueError(f'Unknown policy {policy}, expected one of {POLICIES}')
+        self.scheduler = scheduler
+        self.name = name
+        self.rule = rule
+        self.policy = policy
+        self.jitter = jitter
+        self.due = 0.0
+        self.pending = 0
+        self.waiters: Deque[asyncio.Future] = collections.deque()
+        self.fired = 0
+        self.misfired = 0
+        self.skipped = 0
+        self.lag = Histogram()
+        self.cancelled = False
+
+    def next_due(self, after: float) -> float:
+        now = datetime.datetime.fromtimestamp(after, datetime.timezone.utc)
+        delay = crontab(self.rule).next(now=now, default_utc=True)
+        return after + delay
+
+    def tick(self, now: float):
+        self.lag.record(now - self.due)
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.fired += 1
+                waiter.set_result(None)
+                return
+        self.misfired += 1
+        if self.policy == 'all' or not self.pending and self.policy == 'coalesce':
+            self.pending += 1
+        else:
+            self.skipped += 1
+
+    async def wait(self):
+        if self.pending:
+            self.pending -= 1
+            self.fired += 1
+            return
+        waiter = self.scheduler.loop.create_future()
+        self.waiters.append(waiter)
+        try:
+            await waiter
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+    def cancel(self):
+        self.cancelled = True
+        for waiter in self.waiters:
+            waiter.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rule': self.rule,
+            'policy': self.policy,
+            'due': self.due,
+            'pending': self.pending,
+            'fired': self.fired,
+            'misfired': self.misfired,
+            'skipped': self.skipped,
+            'lag': self.lag.summary(),
+        }
+
+
+class Scheduler(AbstractNamedEntity):
+    """
+    One timer over heap of entries for crontab and sleep of workers,
+    worker with scheduler subscribes to it instead of own sleep.
+    Tick missed while worker is busy is a misfire resolved by policy:
+    skip drops it, coalesce keeps one pending tick, all keeps each tick.
+    config:
+        policy: [skip|coalesce|all] default policy of subscription, default skip
+        jitter: duration max random delay of tick, default 0
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._counter = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._subscriptions: Dict[str, Subscription] = {}
+        super().__init__(*args, **kwargs)
+
+    def set_config(self, config):
+        super().set_config(config)
+        self._policy = self.config.get('policy', 'skip')
+        self._jitter = self.config.get_duration('jitter', default=0)
+
+    def set_context(self, context):
+        super().set_context(context)
+        context.on_cleanup.append(self.cleanup)
+
+    def subscribe(
+        self,
+        name: str,
+        rule: str,
+        *,
+        policy: Optional[str] = None,
+        jitter: Optional[float] = None,
+    ) -> Subscription:
+        old = self._subscriptions.get(name)
+        if old is not None:
+            old.cancel()
+        sub = Subscription(
+            self,
+            name,
+            rule,
+            policy or self._policy,
+            self._jitter if jitter is None else jitter,
+        )
+        self._subscriptions[name] = sub
+        sub.due = sub.next_due(time.time())
+        self._push(sub.due + random.uniform(0, sub.jitter), sub)
+        return sub
+
+    def unsubscribe(self, name: str):
+        sub = self._subscriptions.pop(name, None)
+        if sub is not None:
+            sub.cancel()
+
+    async def sleep(self, delay: float):
+        """Sleeps on timer of scheduler"""
+        waiter = self.loop.create_future()
+        self._push(time.time() + delay, waiter)
+        await waiter
+
+    def _push(self, when: float, item):
+        entry = (when, next(self._counter), item)
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._arm()
+
+    def _arm(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._heap:
+            delay = self._heap[0][0] - time.time()
+            self._timer = self.loop.call_at(self.loop.time() + delay, self._fire)
+
+    def _fire(self):
+        self._timer = None
+        heap = self._heap
+        now = time.time()
+        while heap and heap[0][0] <= now:
+            _, _, item = heapq.heappop(heap)
+            if isinstance(item, asyncio.Future):
+                if not item.done():
+                    item.set_result(None)
+            elif not item.cancelled:
+                item.tick(now)
+                # ticks missed while loop was blocked are misfires too
+                due = item.next_due(item.due)
+                while due <= now:
+                    item.due = due
+                    item.tick(now)
+                    due = item.next_due(due)
+                item.due = due
+                heapq.heappush(heap, (due + random.uniform(0, item.jitter), next(self._counter), item))
+        self._arm()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: sub.stats() for name, sub in self._subscriptions.items()}
+
+    async def cleanup(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for sub in self._subscriptions.values():
+            sub.cancel()
+        for _, _, item in self._heap:
+            if isinstance(item, asyncio.Future):
+                item.cancel()
+        self._heap.clear()
@@ -1,13 +1,18 @@
 import asyncio
+import os
 import shlex
 import subprocess
 import sys
+import tempfile
 import weakref
 from asyncio.subprocess import Process
 from typing import (
     Any,
+    AsyncIterator,
     Callable,
     Coroutine,
+    Dict,
+    List,
     Mapping,
     MutableMapping,
     Optional,
@@ -21,6 +26,8 @@ from .. import utils
 from ..core.formatter import FormattedEntity
 from .base import Worker
 
+LIMIT = 2**20
+
 
 class Subprocess(FormattedEntity, Worker):
     """
@@ -28,6 +35,8 @@ class Subprocess(FormattedEntity, Worker):
         cmd: str - shell command with mask python format
              list[str] - exec command with mask python format
         aioworkers: argv or str for aioworkers subprocess
+        snapshot: [stdin|file|memfd] - how config is passed to aioworkers,
+                  snapshot of config is encoded once until config changes
         stdin: [none | PIPE | DEVNULL]
         stdout: [none | PIPE | DEVNULL]
         stderr: [none | PIPE | STDOUT | DEVNULL]
@@ -35,6 +44,14 @@ class Subprocess(FormattedEntity, Worker):
         params: dict of params
         daemon: true
         format: [json|str|bytes]
+        pool: int count of persistent processes, values are sent
+              to idle process as frames on stdin, results are read
+              as frames from stdout, crashed process is respawned
+        frame: [line|size] - default line, size is prefix 4 bytes length
+        stream: bool - each frame of stdout is decoded and put to output
+                while process runs, reading pauses while output is full,
+                not supported with pool
+        limit: size of read buffer and max line frame, default 1M
     """
 
     _event: asyncio.Event
@@ -43,6 +60,7 @@ class Subprocess(FormattedEntity, Worker):
     _cmd: Tuple[str, ...]
     _shell: bool
     _keeper: Optional[asyncio.Task]
+    _idle: asyncio.Queue
 
     def __init__(self, *args, **kwargs):
         self._processes = weakref.WeakValueDictionary()
@@ -54,6 +72,17 @@ class Subprocess(FormattedEntity, Worker):
         self._keeper = None
         self.params = {"python": sys.executable, "worker": self}
         self._subprocess_kwargs = {}
+        self._pool_size = 0
+        self._pool: List[Process] = []
+        self._pool_lock = asyncio.Lock()
+        self._respawns = 0
+        self._streaming = False
+        self._snapshot = ""
+        self._snapshot_data: Optional[bytes] = None
+        self._snapshot_fd: Optional[int] = None
+        # temp file of snapshot to processes started with it
+        self._snapshot_files: Dict[str, List[Process]] = {}
+        self._snapshot_path: Optional[str] = None
         super().__init__(*args, **kwargs)
 
     def set_config(self, config: ValueExtractor):
@@ -81,7 +110,15 @@ class Subprocess(FormattedEntity, Worker):
 
         is_shell = False
         if "aioworkers" in self.config:
-            cmd = ["{python}", "-m", "aioworkers", "--config-stdin"]
+            self._snapshot = self.config.get("snapshot", "stdin")
+            if self._snapshot == "stdin":
+                cmd = ["{python}", "-m", "aioworkers", "--config-stdin"]
+                self._subprocess_kwargs["stdin"] = subprocess.PIPE
+                self._config_stdin = True
+            elif self._snapshot in ("file", "memfd"):
+                cmd = ["{python}", "-m", "aioworkers", "--config-snapshot", "{snapshot}"]
+            else:
+                raise ValueError(f"Unknown snapshot {self._snapshot}")
             value = self.config["aioworkers"]
             if isinstance(value, str):
                 cmd.append(value)
@@ -91,8 +128,6 @@ class Subprocess(FormattedEntity, Worker):
                 cmd.extend(value)
             else:
                 raise TypeError(value)
-            self._subprocess_kwargs["stdin"] = subprocess.PIPE
-            self._config_stdin = True
         else:
             cmd = self.config.get("cmd") or []
             if isinstance(cmd, str):
@@ -111,10 +146,29 @@ class Subprocess(FormattedEntity, Worker):
         if self._daemon:
             self._wait = False
 
+        self._pool_size = self.config.get_int("pool", default=0)
+        self._frame = self.config.get("frame", "line")
+        if self._frame not in ("line", "size"):
+            raise ValueError(f"Unknown frame {self._frame}")
+        self._stream = self.config.get_bool("stream", default=False)
+        if self._stream and self._pool_size:
+            raise ValueError("Stream is not supported with pool")
+        self._limit = int(self.config.get_size("limit", default=LIMIT))
+
     async def init(self):
         self._event = asyncio.Event()
         self._event.clear()
+        self._idle = asyncio.Queue()
         await super().init()
+        if self._snapshot:
+            self.context.on_cleanup.append(self.cleanup)
+        if self.config.get("run"):
+            pass
+        elif self._pool_size:
+            self.run = self.run_pool  # type: ignore
+        elif self._stream:
+            self.run = self.run_cmd  # type: ignore
+            self._streaming = True
 
     @property
     def process(self) -> Optional[Process]:
@@ -123,13 +177,13 @@ class Subprocess(FormattedEntity, Worker):
                 return p
         return None
 
-    def create_subprocess(self, *args) -> Coroutine[Any, Any, Process]:
+    def create_subprocess(self, *args, **kwargs) -> Coroutine[Any, Any, Process]:
         c: Callable[..., Coroutine[Any, Any, Process]]
         if self._shell:
             c = asyncio.create_subprocess_shell
         else:
             c = asyncio.create_subprocess_exec
-        return c(*args, **self._subprocess_kwargs)
+        return c(*args, **dict(self._subprocess_kwargs, **kwargs))
 
     def make_command(self, value: Any = None) -> Tuple[str, ...]:
         args: Sequence[str] = ()
@@ -160,14 +214,16 @@ class Subprocess(FormattedEntity, Worker):
             value = kwargs
         else:
             value = None
+        kwargs = self._config_kwargs()
         cmd = self.make_command(value)
         self.logger.info(" ".join(cmd))
-        process = await self.create_subprocess(*cmd)
-        self._processes[process.pid] = process
-        if self._config_stdin:
-            assert process.stdin
-            utils.dump_to_fd(process.stdin, self.context.config)
-            await process.stdin.drain()
+        if self._stream:
+            kwargs.update(stdout=subprocess.PIPE, limit=self._limit)
+        process = await self.create_subprocess(*cmd, **kwargs)
+        self._started(process)
+        await self._send_config(process)
+        if self._stream:
+            return await self._stream_output(process)
         if self._wait:
             await process.wait()
         else:
@@ -176,6 +232,185 @@ class Subprocess(FormattedEntity, Worker):
             data = await process.stdout.read()
             return self.decode(data)
 
+    def _config_kwargs(self) -> Dict[str, Any]:
+        """Writes snapshot of config for child once per change of config"""
+        if self._snapshot not in ("file", "memfd"):
+            return {}
+        data = self.context.config.snapshot()
+        if data is not self._snapshot_data:
+            self._snapshot_data = data
+            self._snapshot_path = None
+            if self._snapshot_fd is not None:
+                os.close(self._snapshot_fd)
+                self._snapshot_fd = None
+            if self._snapshot == "memfd" and hasattr(os, "memfd_create"):
+                fd = os.memfd_create(f"{self.name}.config")
+                self.params["snapshot"] = f"/dev/fd/{fd}"
+                self._snapshot_fd = fd
+            else:
+                fd, path = tempfile.mkstemp(prefix="aioworkers-", suffix=".config")
+                self.params["snapshot"] = self._snapshot_path = path
+                self._snapshot_files[path] = []
+            with open(fd, "wb", closefd=fd != self._snapshot_fd) as f:
+                f.write(data)
+            self._unlink_snapshots()
+        if self._snapshot_fd is not None:
+            return {"pass_fds": (self._snapshot_fd,)}
+        return {}
+
+    def _unlink_snapshots(self, force: bool = False):
+        """Removes replaced snapshot files when processes started with them exited"""
+        for path, processes in list(self._snapshot_files.items()):
+            if not force:
+                if path == self._snapshot_path:
+                    continue
+                elif any(p.returncode is None for p in processes):
+                    continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            del self._snapshot_files[path]
+
+    def _started(self, process: Process):
+        self._processes[process.pid] = process
+        if self._snapshot_path is not None:
+            processes = self._snapshot_files[self._snapshot_path]
+            processes[:] = [p for p in processes if p.returncode is None]
+            processes.append(process)
+
+    async def _send_config(self, process: Process):
+        if self._config_stdin:
+            assert process.stdin
+            data = self.context.config.snapshot()
+            process.stdin.write(utils.SIZE.pack(len(data)))
+            process.stdin.write(data)
+            await process.stdin.drain()
+
+    async def _spawn_process(self) -> Process:
+        kwargs = self._config_kwargs()
+        cmd = self.make_command()
+        self.logger.info(" ".join(cmd))
+        process = await self.create_subprocess(
+            *cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            limit=self._limit,
+            **kwargs,
+        )
+        self._started(process)
+        await self._send_config(process)
+        self._pool.append(process)
+        self._idle.put_nowait(process)
+        return process
+
+    async def _respawn(self, process: Process):
+        if process not in self._pool:
+            return
+        self._pool.remove(process)
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        await process.wait()
+        if len(self._pool) < self._pool_size:
+            self._respawns += 1
+            self.logger.warning("Respawn process %s, exit code %s", process.pid, process.returncode)
+            await self._spawn_process()
+
+    async def _write_frame(self, process: Process, data: bytes):
+        assert process.stdin
+        if self._frame == "size":
+            process.stdin.write(utils.SIZE.pack(len(data)))
+        else:
+            data += b"\n"
+        process.stdin.write(data)
+        await process.stdin.drain()
+
+    async def _read_frame(self, process: Process) -> bytes:
+        assert process.stdout
+        if self._frame == "size":
+            header = await process.stdout.readexactly(utils.SIZE.size)
+            (size,) = utils.SIZE.unpack(header)
+            return await process.stdout.readexactly(size)
+        data = await process.stdout.readline()
+        if not data.endswith(b"\n"):
+            raise asyncio.IncompleteReadError(data, None)
+        return data[:-1]
+
+    async def iter_frames(self, stream: asyncio.StreamReader) -> AsyncIterator[bytes]:
+        while True:
+            if self._frame == "size":
+                try:
+                    header = await stream.readexactly(utils.SIZE.size)
+                except asyncio.IncompleteReadError as e:
+                    if e.partial:
+                        raise
+                    return
+                (size,) = utils.SIZE.unpack(header)
+                yield await stream.readexactly(size)
+            else:
+                data = await stream.readline()
+                if data.endswith(b"\n"):
+                    yield data[:-1]
+                    continue
+                elif data:
+                    yield data
+                return
+
+    async def _stream_output(self, process: Process) -> int:
+        """Puts decoded frames of stdout to output, returns count of frames"""
+        assert process.stdout
+        count = 0
+        async for data in self.iter_frames(process.stdout):
+            value = self.decode(data)
+            count += 1
+            if self.output is not None:
+                # StreamReader pauses pipe while output waits
+                await self.output.put(value)
+        await process.wait()
+        return count
+
+    async def put_result(self, result: Any):
+        # frames are already put to output by run_cmd
+        if not self._streaming:
+            await super().put_result(result)
+
+    async def run_pool(self, value: Any = None) -> Any:
+        if len(self._pool) < self._pool_size:
+            async with self._pool_lock:
+                while len(self._pool) < self._pool_size:
+                    await self._spawn_process()
+        data = self.encode(value)
+        if isinstance(data, str):
+            data = data.encode()
+        if self._frame == "line" and b"\n" in data:
+            raise ValueError("Line frame contains new line")
+        while True:
+            process = await self._idle.get()
+            if process not in self._pool:
+                continue
+            elif process.returncode is None:
+                break
+            # died while idle
+            await self._respawn(process)
+        ok = False
+        try:
+            await self._write_frame(process, data)
+            result = await self._read_frame(process)
+            ok = True
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            await self._respawn(process)
+            raise RuntimeError(f"Process {process.pid} died") from e
+        finally:
+            if ok:
+                self._idle.put_nowait(process)
+            elif process in self._pool:
+                # state of protocol is unknown after error or cancel
+                self.loop.create_task(self._respawn(process))
+        return self.decode(result)
+
     async def work(self):
         if self._daemon:
             await self._event.wait()
@@ -205,7 +440,7 @@ class Subprocess(FormattedEntity, Worker):
             except asyncio.CancelledError:
                 pass
             self._keeper = None
-        for process in self._processes.values():
+        for process in list(self._processes.values()):
             try:
                 if process.returncode is not None:
                     continue
@@ -216,4 +451,24 @@ class Subprocess(FormattedEntity, Worker):
                 await process.wait()
             except ProcessLookupError:
                 pass
+        self._pool.clear()
+        self._idle = asyncio.Queue()
         await super().stop(force=force)
+
+    async def cleanup(self):
+        if self._snapshot_fd is not None:
+            os.close(self._snapshot_fd)
+            self._snapshot_fd = None
+        self._unlink_snapshots(force=True)
+        self._snapshot_path = None
+        self._snapshot_data = None
+
+    async def status(self):
+        status = await super().status()
+        if self._pool_size:
+            status["pool"] = {
+                "pids": [p.pid for p in self._pool],
+                "idle": self._idle.qsize(),
+                "respawns": self._respawns,
+            }
+        return status
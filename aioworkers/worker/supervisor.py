@@ -1,8 +1,13 @@
 import asyncio
+import collections
+import itertools
 import logging
-import random
+import math
+from typing import Counter, List, Optional
 
+from ..utils import import_name
 from .base import Worker
+from .dispatch import DISPATCHERS, Dispatcher
 
 logger = logging.getLogger(__name__)
 
@@ -12,14 +17,58 @@ class Supervisor(Worker):
     config:
         children: Union[int, list[str], list[dict]] - count or list
         child: Mapping - config for child worker
+        max_children: int enables autoscaling by input up to count
+        min_children: int lower bound of autoscaling, default children
+        target_depth: int items in input per child, default 10
+        target_latency: duration of average dwell in instrumented input
+        hysteresis: float ratio of target to scale down, default 0.5
+        scale_interval: duration between checks, default 1s
+        cooldown: duration after scaling without changes, default 10s
+        dispatch: str strategy of call without input
+            [least|round_robin|random|hash] or path to Dispatcher, default least
+        dispatch_key: str.path to callable of call arguments returns key for hash
+        replicas: int virtual nodes of child for hash, default 100
     """
 
+    _max_children = 0
+    _min_children = 0
+    _target_depth = 10
+    _target_latency: Optional[float] = None
+    _hysteresis = 0.5
+    _scale_interval = 1.0
+    _cooldown = 10.0
+    _scaled_at = -math.inf
+    _dwell = (0, 0.0)
+    _dispatcher: Dispatcher
+
     def __init__(self, *args, **kwargs):
         self._children = {}
+        self._child_seq = itertools.count()
+        self._in_flight: Counter[str] = collections.Counter()
+        self._calls: Counter[str] = collections.Counter()
         super().__init__(*args, **kwargs)
 
+    def set_config(self, config):
+        super().set_config(config)
+        cfg = self.config
+        self._max_children = cfg.get_int('max_children', default=0)
+        children = cfg.get('children', 0)
+        count = children if isinstance(children, int) else len(children)
+        self._min_children = cfg.get_int('min_children', default=count)
+        self._target_depth = cfg.get_int('target_depth', default=10)
+        self._target_latency = cfg.get_duration('target_latency', default=None, null=True)
+        self._hysteresis = cfg.get_float('hysteresis', default=0.5)
+        self._scale_interval = cfg.get_duration('scale_interval', default=1)
+        self._cooldown = cfg.get_duration('cooldown', default=10)
+        self._dispatch = cfg.get('dispatch', 'least')
+        dispatcher = DISPATCHERS.get(self._dispatch) or import_name(self._dispatch)
+        self._dispatcher = dispatcher(self._in_flight, cfg)
+
     def __getattr__(self, item):
-        return self._children[item]
+        try:
+            return self._children[item]
+        except KeyError:
+            raise AttributeError(item) from None
 
     def __getitem__(self, item):
         return self._children[item]
@@ -33,6 +82,7 @@ class Supervisor(Worker):
             child = self.create_child(p)
             self._children[name] = child
             children.append(child)
+        self._dispatcher.update(list(self._children))
         await self._wait(lambda w: w.init(), children)
 
     def _wait(self, lmbd, children=()):
@@ -41,13 +91,21 @@ class Supervisor(Worker):
 
     def __call__(self, *args, **kwargs):
         if self.input is None:
-            vs = random.choice(list(self._children.values()))
-            return vs(*args, **kwargs)
+            name = self._dispatcher.choose(args, kwargs)
+            self._in_flight[name] += 1
+            self._calls[name] += 1
+            return self._call_child(name, args, kwargs)
         else:
             return self.input.put(*args, **kwargs)
 
+    async def _call_child(self, name, args, kwargs):
+        try:
+            return await self._children[name](*args, **kwargs)
+        finally:
+            self._in_flight[name] -= 1
+
     def _gen_child_params(self):
-        children = self.config.children
+        children = self.config.get('children', self._min_children)
         if isinstance(children, int):
             for i in range(children):
                 yield {'name': 'child' + str(i)}
@@ -70,13 +128,19 @@ class Supervisor(Worker):
         add = {}
         if not conf.get('input') and self.input is not None:
             add['input'] = "." + self.name
+            if not conf.get('handoff'):
+                # items of children are handed off past supervisor
+                add['handoff'] = self.config.get('handoff') or self.config.get('input')
         if not conf.get('output') and self.output is not None:
             add['output'] = "." + self.name
         cls = conf.get_obj('cls')
         add['name'] = '.'.join([self.name, conf.get('name', 'child')])
         if add:
             conf = conf.new_child(add)
-        return cls(conf, context=self.context, loop=self.loop)
+        child = cls(conf, context=self.context, loop=self.loop)
+        if isinstance(child, Worker):
+            child._supervised = True
+        return child
 
     async def get(self):
         assert self.input is not None
@@ -89,8 +153,11 @@ class Supervisor(Worker):
     async def work(self):
         children = list(self._children.values())
         then: str
+        timeout = None
         if self._persist:
             then = asyncio.FIRST_EXCEPTION
+            if self._max_children and self.input is not None:
+                timeout = self._scale_interval
         else:
             then = asyncio.ALL_COMPLETED
         while self._children:
@@ -98,19 +165,109 @@ class Supervisor(Worker):
             d, p = await asyncio.wait(
                 [i._future for i in self._children.values()],
                 return_when=then,
+                timeout=timeout,
             )
             if not self._persist:
                 break
-            await asyncio.sleep(1)
+            if timeout:
+                await self.autoscale()
+            if d:
+                await asyncio.sleep(1)
             children = [i for i in self._children.values() if i._future in d]
 
+    def _depth(self) -> int:
+        try:
+            return len(self.input)  # type: ignore
+        except TypeError:
+            metrics = self.input.metrics() if self.input is not None else None
+            return metrics['depth'] if metrics else 0
+
+    def _latency(self) -> Optional[float]:
+        """Average dwell in input since previous check"""
+        metrics = self.input.metrics() if self.input is not None else None
+        if not metrics:
+            return None
+        dwell = metrics['dwell']
+        count, total = dwell['count'], dwell['avg'] * dwell['count']
+        prev_count, prev_total = self._dwell
+        self._dwell = count, total
+        if count <= prev_count:
+            return 0.0
+        return (total - prev_total) / (count - prev_count)
+
+    async def autoscale(self):
+        """Spawns or stops children by depth and latency of input"""
+        depth = self._depth()
+        latency = self._latency()
+        now = self.loop.time()
+        if now - self._scaled_at < self._cooldown:
+            return
+        count = len(self._children)
+        slow = bool(self._target_latency and latency and latency > self._target_latency)
+        want = math.ceil(depth / self._target_depth) if self._target_depth else count
+        if slow:
+            want = max(want, count + 1)
+        want = min(max(want, self._min_children), self._max_children)
+        if want > count:
+            await self._scale_up(want - count)
+        elif count <= self._min_children or slow:
+            return
+        elif depth > self._target_depth * (count - 1) * self._hysteresis:
+            return
+        elif self._target_latency and latency and latency >= self._target_latency * self._hysteresis:
+            return
+        elif not await self._scale_down():
+            return
+        self._scaled_at = now
+
+    async def _scale_up(self, count: int):
+        children: List[Worker] = []
+        while len(children) < count:
+            name = 'child' + str(next(self._child_seq))
+            if name in self._children:
+                continue
+            child = self.create_child({'name': name})
+            self._children[name] = child
+            children.append(child)
+        self._dispatcher.update(list(self._children))
+        await self._wait(lambda w: w.init(), children)
+        await self._wait(lambda w: w.start(), children)
+        self.logger.info('Supervisor %s scaled up to %s', self.name, len(self._children))
+
+    async def _scale_down(self) -> bool:
+        for name, child in reversed(list(self._children.items())):
+            if child.running() and child._is_sleep:
+                del self._children[name]
+                self._dispatcher.update(list(self._children))
+                await child.stop(force=False)
+                self.logger.info('Supervisor %s scaled down to %s', self.name, len(self._children))
+                return True
+        return False
+
     async def stop(self, force=False):
         await super().stop(force=True)
         await self._wait(lambda w: w.stop(force=force))
 
+    async def drain(self, timeout: Optional[float] = None):
+        if timeout is None:
+            timeout = self._drain
+        await super().stop(force=True)
+        await self._wait(lambda w: w.drain(timeout))
+
     async def status(self):
         status = await super().status()
         status['children'] = {}
+        status['dispatch'] = {
+            'strategy': self._dispatch,
+            'in_flight': {name: self._in_flight[name] for name in self._children},
+            'calls': {name: self._calls[name] for name in self._children},
+        }
+        if self._max_children:
+            status['autoscale'] = {
+                'min': self._min_children,
+                'max': self._max_children,
+                'depth': self._depth(),
+            }
         for name, w in self._children.items():
             status['children'][name] = await w.status()
         return status
@@ -0,0 +1,75 @@
+"""
+Compare rows/sec of csv DictReader with next() in executor per row.
+
+    python benchmarks/csv_reader.py [size_mb] [batch]
+"""
+
+import asyncio
+import csv
+import os
+import sys
+import tempfile
+import time
+
+from aioworkers.core.config import Config
+from aioworkers.core.context import Context
+from aioworkers.queue.csv import DictReader
+
+
+def generate(path: str, size: int) -> None:
+    row = b'%d,name%d,%d.5,true\n'
+    with open(path, 'wb') as f:
+        f.write(b'id,name,score,flag\n')
+        i = 0
+        while f.tell() < size:
+            f.writelines(row % (j, j, j) for j in range(i, i + 10000))
+            i += 10000
+
+
+async def per_row(path: str, batch: int) -> int:
+    loop = asyncio.get_running_loop()
+    count = 0
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        while await loop.run_in_executor(None, next, reader, None) is not None:
+            count += 1
+    return count
+
+
+async def chunked(path: str, batch: int) -> int:
+    config = Config()
+    config.update({'reader.cls': 'aioworkers.queue.csv.DictReader', 'reader.file': path})
+    count = 0
+    async with Context(config) as ctx:
+        reader: DictReader = ctx.reader
+        try:
+            while True:
+                count += len(await reader.get_many(batch))
+        except EOFError:
+            pass
+    return count
+
+
+async def main(size: int, batch: int) -> None:
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        generate(path, size)
+        print(f'{"reader":<10}{"rows/s":>14}{"MB/s":>10}')
+        base = 0.0
+        for func in (per_row, chunked):
+            start = time.perf_counter()
+            count = await func(path, batch)
+            elapsed = time.perf_counter() - start
+            rate = count / elapsed
+            base = base or rate
+            print(f'{func.__name__:<10}{rate:>14,.0f}{size / elapsed / 2**20:>10.1f}  x{rate / base:.1f}')
+    finally:
+        os.unlink(path)
+
+
+if __name__ == '__main__':
+    argv = sys.argv[1:]
+    size = int(argv[0]) if argv else 64
+    batch = int(argv[1]) if len(argv) > 1 else 1000
+    asyncio.run(main(size * 2**20, batch))
@@ -0,0 +1,47 @@
+"""
+Throughput of DurableQueue with fsync on local disk.
+
+    python benchmarks/durable_queue.py [count] [path]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+
+from aioworkers.queue.durable import DurableQueue
+
+
+async def main(count: int, path: str) -> None:
+    q = DurableQueue(path=path, format='pickle')
+    await q.init()
+    value = {'id': 0, 'payload': 'x' * 64}
+    start = time.perf_counter()
+    for _ in range(count):
+        await q.put(value)
+    await q.flush()
+    put = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(count):
+        await q.get()
+    await q.flush()
+    get = time.perf_counter() - start
+    await q.cleanup()
+    print(f'put {count / put:>12,.0f}/s')
+    print(f'get {count / get:>12,.0f}/s')
+
+    q = DurableQueue(path=path, format='pickle')
+    start = time.perf_counter()
+    await q.init()
+    await q.cleanup()
+    print(f'recover {time.perf_counter() - start:.3f}s')
+
+
+if __name__ == '__main__':
+    argv = sys.argv[1:]
+    count = int(argv[0]) if argv else 500_000
+    if len(argv) > 1:
+        asyncio.run(main(count, argv[1]))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(main(count, tmp))
@@ -0,0 +1,58 @@
+"""
+Compare lines/sec of PipeLineQueue.get from a pipe with
+readline through executor per line.
+
+    python benchmarks/pipeline_queue.py [count]
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from aioworkers.queue.proxy import PipeLineQueue
+
+
+def feed(count: int):
+    r, w = os.pipe()
+
+    def write():
+        with os.fdopen(w, 'wb') as f:
+            for i in range(count):
+                f.write(b'%d\n' % i)
+
+    threading.Thread(target=write, daemon=True).start()
+    return os.fdopen(r, 'rb')
+
+
+async def readline(count: int) -> float:
+    reader = feed(count)
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    for _ in range(count):
+        await loop.run_in_executor(None, reader.readline)
+    return count / (time.perf_counter() - start)
+
+
+async def queue(count: int) -> float:
+    q = PipeLineQueue({'format': 'newline:str'})
+    q.set_reader(feed(count))
+    start = time.perf_counter()
+    for _ in range(count):
+        await q.get()
+    result = count / (time.perf_counter() - start)
+    await q.cleanup()
+    return result
+
+
+async def main(count: int) -> None:
+    a = await readline(count)
+    b = await queue(count)
+    print(f'{"readline/s":>14}{"chunked/s":>14}{"x":>8}')
+    print(f'{a:>14,.0f}{b:>14,.0f}{b / a:>8.1f}')
+
+
+if __name__ == '__main__':
+    argv = sys.argv[1:]
+    asyncio.run(main(int(argv[0]) if argv else 100_000))
@@ -0,0 +1,48 @@
+"""
+Compare items/sec of ProxyQueue with executor per item and prefetch threads.
+
+    python benchmarks/proxy_queue.py [count] [prefetch]
+"""
+
+import asyncio
+import queue
+import sys
+import time
+
+from aioworkers.core.config import Config
+from aioworkers.core.context import Context
+from aioworkers.queue.proxy import ProxyQueue
+
+
+async def measure(count: int, prefetch: int) -> float:
+    config = Config()
+    config.update({'q.cls': 'aioworkers.queue.proxy.ProxyQueue', 'q.prefetch': prefetch})
+    async with Context(config) as ctx:
+        q: ProxyQueue = ctx.q
+        q.set_queue(queue.Queue())
+        start = time.perf_counter()
+
+        async def produce():
+            for i in range(count):
+                await q.put(i)
+
+        async def consume():
+            for _ in range(count):
+                await q.get()
+
+        await asyncio.gather(produce(), consume())
+        return count / (time.perf_counter() - start)
+
+
+async def main(count: int, prefetch: int) -> None:
+    single = await measure(count, 0)
+    buffered = await measure(count, prefetch)
+    print(f'{"executor/s":>14}{"prefetch/s":>14}{"x":>8}')
+    print(f'{single:>14,.0f}{buffered:>14,.0f}{buffered / single:>8.1f}')
+
+
+if __name__ == '__main__':
+    argv = sys.argv[1:]
+    count = int(argv[0]) if argv else 20_000
+    prefetch = int(argv[1]) if len(argv) > 1 else 1000
+    asyncio.run(main(count, prefetch))
@@ -0,0 +1,52 @@
+"""
+Compare items/sec of single and batched queue paths.
+
+    python benchmarks/queue_batch.py [count] [batch]
+"""
+
+import asyncio
+import sys
+import time
+
+from aioworkers.queue.base import PriorityQueue, Queue, ScoreQueue
+from aioworkers.queue.timeout import TimestampQueue, UniqueQueue
+
+QUEUES = (Queue, PriorityQueue, ScoreQueue, TimestampQueue, UniqueQueue)
+
+
+async def single(q, count: int, batch: int) -> None:
+    for i in range(count):
+        await q.put(i)
+    for _ in range(count):
+        await q.get()
+
+
+async def batched(q, count: int, batch: int) -> None:
+    for i in range(0, count, batch):
+        await q.put_many(range(i, min(i + batch, count)))
+    n = 0
+    while n < count:
+        n += len(await q.get_many(batch))
+
+
+async def measure(cls, func, count: int, batch: int) -> float:
+    q = cls({})
+    await q.init()
+    start = time.perf_counter()
+    await func(q, count, batch)
+    return count / (time.perf_counter() - start)
+
+
+async def main(count: int, batch: int) -> None:
+    print(f'{"queue":<16}{"single/s":>14}{"batch/s":>14}{"x":>8}')
+    for cls in QUEUES:
+        s = await measure(cls, single, count, batch)
+        b = await measure(cls, batched, count, batch)
+        print(f'{cls.__name__:<16}{s:>14,.0f}{b:>14,.0f}{b / s:>8.1f}')
+
+
+if __name__ == '__main__':
+    argv = sys.argv[1:]
+    count = int(argv[0]) if argv else 200_000
+    batch = int(argv[1]) if len(argv) > 1 else 100
+    asyncio.run(main(count, batch))
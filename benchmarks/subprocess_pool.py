@@ -0,0 +1,64 @@
+"""
+Compare items/sec of Subprocess spawning process per item with persistent pool.
+
+    python benchmarks/subprocess_pool.py [items] [pool]
+"""
+
+import asyncio
+import sys
+import time
+
+from aioworkers.core.config import Config
+from aioworkers.core.context import Context
+
+UPPER = """
+import sys
+for line in sys.stdin:
+    sys.stdout.write(line.upper())
+    sys.stdout.flush()
+"""
+
+
+async def per_item(items: int, pool: int) -> None:
+    config = Config()
+    config.update({'a.cls': 'aioworkers.worker.subprocess.Subprocess', 'a.cmd': ['echo']})
+    async with Context(config) as ctx:
+        sem = asyncio.Semaphore(pool)
+
+        async def call(i):
+            async with sem:
+                await ctx.a.run_cmd(str(i))
+
+        await asyncio.gather(*(call(i) for i in range(items)))
+
+
+async def pooled(items: int, pool: int) -> None:
+    config = Config()
+    config.update(
+        {
+            'a.cls': 'aioworkers.worker.subprocess.Subprocess',
+            'a.cmd': ['{python}', '-c', UPPER],
+            'a.format': 'str',
+            'a.pool': pool,
+        }
+    )
+    async with Context(config) as ctx:
+        await asyncio.gather(*(ctx.a.run(str(i)) for i in range(items)))
+
+
+async def main(items: int, pool: int) -> None:
+    print(f'{"mode":<10}{"items/s":>12}')
+    base = 0.0
+    for func in (per_item, pooled):
+        start = time.perf_counter()
+        await func(items, pool)
+        rate = items / (time.perf_counter() - start)
+        base = base or rate
+        print(f'{func.__name__:<10}{rate:>12,.0f}  x{rate / base:.1f}')
+
+
+if __name__ == '__main__':
+    argv = sys.argv[1:]
+    items = int(argv[0]) if argv else 2000
+    pool = int(argv[1]) if len(argv) > 1 else 4
+    asyncio.run(main(items, pool))
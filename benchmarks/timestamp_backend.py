@@ -0,0 +1,46 @@
+"""
+Compare heap and wheel backends of TimestampQueue on scheduled items.
+
+    python benchmarks/timestamp_backend.py [count] [span]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from aioworkers.queue.timeout import TimestampQueue
+
+
+async def measure(backend: str, count: int, span: float) -> None:
+    loop = asyncio.get_running_loop()
+    async with TimestampQueue(backend=backend, resolution=0.01) as q:
+        getter = loop.create_task(q.get())
+        await asyncio.sleep(0)
+        now = time.time()
+        scores = [now + span * (1 + random.random()) for _ in range(count)]
+        start = time.perf_counter()
+        for i, score in enumerate(scores):
+            await q.put(i, score)
+        put = time.perf_counter() - start
+        await getter
+        await asyncio.sleep(2 * span + now - time.time())
+        start = time.perf_counter()
+        n = 1
+        while n < count:
+            n += len(await q.get_many(1000))
+        get = time.perf_counter() - start
+    print(f'{backend:<8}{count / put:>14,.0f}{count / get:>14,.0f}')
+
+
+async def main(count: int, span: float) -> None:
+    print(f'{"backend":<8}{"put/s":>14}{"get/s":>14}')
+    for backend in ('heap', 'wheel'):
+        await measure(backend, count, span)
+
+
+if __name__ == '__main__':
+    argv = sys.argv[1:]
+    count = int(argv[0]) if argv else 1_000_000
+    span = float(argv[1]) if len(argv) > 1 else 5
+    asyncio.run(main(count, span))
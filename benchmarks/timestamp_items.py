@@ -0,0 +1,65 @@
+"""
+Push/pop throughput and memory of heap items of TimestampQueue
+compared with the former NamedTuple with python level __lt__.
+
+    python benchmarks/timestamp_items.py [count]
+"""
+
+import heapq
+import itertools
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, NamedTuple
+
+from aioworkers.queue.timeout import Item
+
+
+class LegacyItem(NamedTuple):
+    value: Any
+    timestamp: float
+    scheduled: bool = False
+
+    def __lt__(self, other) -> bool:
+        return self.timestamp < other.timestamp
+
+
+def legacy(timestamps):
+    return [LegacyItem(value=i, timestamp=t) for i, t in enumerate(timestamps)]
+
+
+def compact(timestamps):
+    seq = itertools.count()
+    return [Item(t, next(seq), i) for i, t in enumerate(timestamps)]
+
+
+def measure(name, factory, timestamps):
+    tracemalloc.start()
+    items = factory(timestamps)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    heap: list = []
+    start = time.perf_counter()
+    for item in items:
+        heapq.heappush(heap, item)
+    push = time.perf_counter() - start
+    start = time.perf_counter()
+    while heap:
+        heapq.heappop(heap)
+    pop = time.perf_counter() - start
+    count = len(timestamps)
+    print(f'{name:<10}{count / push:>14,.0f}{count / pop:>14,.0f}{memory / count:>14.1f}')
+
+
+def main(count: int) -> None:
+    now = time.time()
+    timestamps = [now + random.random() for _ in range(count)]
+    print(f'{"item":<10}{"push/s":>14}{"pop/s":>14}{"bytes/item":>14}')
+    measure('legacy', legacy, timestamps)
+    measure('compact', compact, timestamps)
+
+
+if __name__ == '__main__':
+    argv = sys.argv[1:]
+    main(int(argv[0]) if argv else 1_000_000)
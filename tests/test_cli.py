@@ -23,6 +23,9 @@ def test_main(mocker):
     ns = mocker.Mock()
     ns.config = {"a": 1}
     ns.config_stdin = False
+    ns.config_snapshot = None
+    ns.profile_startup = False
+    ns.profile_trace = None
     ns.multiprocessing = False
     ns.groups = None
     ns.processes = []
@@ -1,8 +1,9 @@
 import asyncio
-from typing import Any
+from typing import Any, Optional
 
 import pytest
 
+from aioworkers.core.base import AbstractEntity, link
 from aioworkers.core.config import Config, MergeDict, ValueExtractor
 from aioworkers.core.context import (
     Context,
@@ -199,3 +200,35 @@ async def test_get_object():
             assert ctx.get_object(".x.x")
 
         assert pytest is ctx.get_object("pytest")
+
+
+class Entity(AbstractEntity):
+    other: Optional[AbstractEntity] = link(nullable=True)
+    events: list = []
+
+    async def init(self):
+        name = self.config.name
+        self.events.append(('start', name))
+        await asyncio.sleep(0.01)
+        self.events.append(('end', name))
+
+
+async def test_waves(event_loop):
+    Entity.events = []
+    cls = 'tests.test_context.Entity'
+    config = Config(
+        a=dict(cls=cls),
+        b=dict(cls=cls, other='.a'),
+        c=dict(cls=cls, other='.a'),
+        d=dict(cls=cls, params={'x': ['.b']}, other='c'),
+        x=dict(cycle1=dict(cls=cls, other='.x.cycle2'), cycle2=dict(cls=cls, other='.x.cycle1')),
+    )
+    async with Context(config, loop=event_loop) as ctx:
+        waves = [sorted(wave) for wave in ctx.processors.waves]
+        assert waves == [['a'], ['b', 'c'], ['d'], ['x.cycle1', 'x.cycle2']]
+        assert ctx.processors.dependencies()['d'] == {'b', 'c'}
+        events = Entity.events
+        assert events.index(('end', 'a')) < events.index(('start', 'b'))
+        assert events.index(('start', 'c')) < events.index(('end', 'b'))
+        assert events.index(('end', 'c')) < events.index(('start', 'd'))
+        assert ctx.timing()['d']['init'] > 0
@@ -1,13 +1,21 @@
+import asyncio
 import os
 import tempfile
 
 import pytest
 
+from aioworkers.core.config import Config
+from aioworkers.core.context import Context
+
+
+async def passthrough(worker, value):
+    return value
+
 
 @pytest.fixture
 def csv_file():
     with tempfile.NamedTemporaryFile(delete=False) as tmpfile1:
-        tmpfile1.write(b'name,uid\nx,3\nf,4')
+        tmpfile1.write(b'name,uid\nx,3\nf,4\n\n"a\nb",\n')
         tmpfile1.flush()
     yield tmpfile1
     os.unlink(tmpfile1.name)
@@ -18,7 +26,21 @@ def config_yaml(csv_file):
     return """
     reader:
         cls: aioworkers.queue.csv.DictReader
-        file: {}
+        file: {0}
+    typed:
+        cls: aioworkers.queue.csv.DictReader
+        file: {0}
+        chunk: 2
+        types:
+            uid: int
+    q:
+        cls: aioworkers.queue.base.Queue
+    worker:
+        cls: aioworkers.worker.base.Worker
+        input: .typed
+        output: .q
+        batch: 2
+        run: tests.test_csv.passthrough
     """.format(csv_file.name)
 
 
@@ -26,3 +48,46 @@ async def test_dictreader(context):
     reader = context.reader
     assert {'name': 'x', 'uid': '3'} == await reader.get()
     assert {'name': 'f', 'uid': '4'} == await reader.get()
+    assert {'name': 'a\nb', 'uid': ''} == await reader.get()
+    with pytest.raises(EOFError):
+        await reader.get()
+
+
+async def test_typed(context):
+    reader = context.typed
+    assert [{'name': 'x', 'uid': 3}] == await reader.get_many(1)
+    assert [{'name': 'f', 'uid': 4}] == await reader.get_many(2)
+    assert [{'name': 'a\nb', 'uid': None}] == await reader.get_many(2)
+    with pytest.raises(EOFError):
+        await reader.get_many(2)
+
+
+async def test_worker_eof(context):
+    await context.worker.start()
+    await asyncio.wait_for(context.worker._future, 1)
+    assert not context.worker.running()
+    assert 3 == context.q.qsize()
+    assert not context.worker.counter['error']
+
+
+async def test_blank_chunk(event_loop, tmp_path):
+    path = tmp_path / 'blank.csv'
+    path.write_text('a,b\n\n\n1,2\n')
+    config = Config(reader=dict(cls='aioworkers.queue.csv.DictReader', file=str(path), chunk=2))
+    async with Context(config, loop=event_loop) as context:
+        assert {'a': '1', 'b': '2'} == await context.reader.get()
+        with pytest.raises(EOFError):
+            await context.reader.get()
+
+
+async def test_convert_error(event_loop, tmp_path):
+    path = tmp_path / 'bad.csv'
+    path.write_text('a\n1\n2\nbad\n4\n')
+    config = Config(reader=dict(cls='aioworkers.queue.csv.DictReader', file=str(path), types={'a': 'int'}))
+    async with Context(config, loop=event_loop) as context:
+        assert [{'a': 1}, {'a': 2}] == await context.reader.get_many(10)
+        with pytest.raises(ValueError):
+            await context.reader.get()
+        assert {'a': 4} == await context.reader.get()
+        with pytest.raises(EOFError):
+            await context.reader.get()
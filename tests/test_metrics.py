@@ -0,0 +1,32 @@
+import pytest
+
+from aioworkers.core.metrics import Histogram, Meter
+
+
+def test_histogram():
+    h = Histogram()
+    assert 0 == h.summary()['p99']
+    for i in range(1, 1001):
+        h.record(i / 1000)
+    h.record(0)
+    summary = h.summary()
+    assert 1001 == summary['count']
+    assert 0 == summary['min']
+    assert 1 == summary['max']
+    assert summary['p50'] == pytest.approx(0.5, rel=1 / 16)
+    assert summary['p99'] == pytest.approx(0.99, rel=1 / 16)
+    assert {0.0: 0.0, 1.0: 1.0} == h.quantiles([1, 0])
+
+
+def test_meter():
+    now = [0.0]
+    m = Meter(lambda: now[0])
+    for _ in range(60):
+        m.mark(10)
+        now[0] += 1
+    rates = m.rates()
+    assert 600 == rates['count']
+    assert 10 == rates['mean']
+    assert rates['m15'] < rates['m5'] < rates['m1'] < 10
+    now[0] += 3600
+    assert m.rates()['m1'] < 0.01
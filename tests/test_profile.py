@@ -0,0 +1,36 @@
+import io
+import json
+
+from aioworkers.core.config import Config
+from aioworkers.core.context import Context
+from aioworkers.core.profile import StartupProfiler
+
+
+async def test_profile(event_loop):
+    profiler = StartupProfiler()
+    config = Config(
+        q=dict(cls='aioworkers.queue.base.Queue'),
+        w=dict(cls='aioworkers.worker.base.Worker', input='.q', autorun=True),
+    )
+    profiler.attach()
+    try:
+        with profiler.phase('context'):
+            async with Context(config, loop=event_loop) as ctx:
+                profiler.collect(ctx.processors.build_timing())
+    finally:
+        profiler.detach()
+    phases = {(name, phase) for name, phase, *_ in profiler.events}
+    assert {('q', 'import'), ('w', 'set_config'), ('w', 'init'), ('w', 'start'), ('', 'context')} <= phases
+
+    table = profiler.table().splitlines()
+    assert table[0].split() == ['phase', 'seconds']
+    assert table[1].split()[0] == 'context'
+    assert table[3].split() == ['entity', 'import', '__init__', 'set_config', 'init', 'connect', 'start', 'total']
+    assert {row.split()[0] for row in table[4:]} == {'q', 'w'}
+
+    fd = io.StringIO()
+    profiler.dump(fd)
+    trace = json.loads(fd.getvalue())
+    names = {e['args']['name'] for e in trace['traceEvents'] if e['ph'] == 'M'}
+    assert names == {'phases', 'q', 'w'}
+    assert all(e['dur'] >= 0 for e in trace['traceEvents'] if e['ph'] == 'X')
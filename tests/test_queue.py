@@ -1,7 +1,10 @@
+import asyncio
 from typing import Any, TypeVar
 
+import pytest
+
 from aioworkers.core.config import MergeDict
-from aioworkers.queue.base import Queue, ScoreQueue, ScoreQueueMixin
+from aioworkers.queue.base import PriorityQueue, Queue, ScoreQueue, ScoreQueueMixin
 
 TScoreQueue = TypeVar("TScoreQueue", bound=ScoreQueueMixin)
 
@@ -40,3 +43,89 @@ async def test_score_time():
     assert a2 == 4
     assert t1 <= t2
     assert not q
+
+
+async def test_queue_many():
+    q = Queue({})
+    await q.init()
+    await q.put_many([1, 2, 3])
+    assert [1, 2] == await q.get_many(2)
+    assert [3] == await q.get_many(2)
+    with pytest.raises(asyncio.TimeoutError):
+        await q.get_many(2, timeout=0.01)
+
+
+async def test_score_many():
+    q: Any = ScoreQueue({})
+    await q.init()
+    await q.put_many([1, 2], score=3)
+    await q.put(3, 1)
+    assert [(3, 1), (1, 3)] == await q.get_many(2, score=True)
+    assert [2] == await q.get_many(2)
+
+
+async def test_watermarks():
+    q = Queue(maxsize=4, low=1)
+    await q.init()
+    for i in range(4):
+        await q.put(i)
+    assert 1.0 == q.pressure
+    putters = [asyncio.ensure_future(q.put(i)) for i in range(4, 9)]
+    await asyncio.sleep(0)
+    putters[1].cancel()
+    assert [0, 1] == await q.get_many(2)
+    await asyncio.sleep(0)
+    assert q.full()
+    assert [False, True, False, False, False] == [f.done() for f in putters]
+    assert 2 == await q.get()
+    await asyncio.sleep(0)
+    assert [True, True, True, True, False] == [f.done() for f in putters]
+    assert [3, 4, 6, 7] == await q.get_many(4)
+    assert 0.0 == q.pressure
+    await asyncio.sleep(0)
+    assert putters[-1].done()
+    assert 0.25 == q.pressure
+    assert 1 == PriorityQueue(maxsize=4, low=1)._low
+
+
+async def test_instrument():
+    q = ScoreQueue({'instrument': True})
+    await q.init()
+    assert Queue({}).metrics() is None
+    await q.put(1)
+    await q.put_many([2, 3])
+    f = asyncio.ensure_future(q.get_many(5))
+    assert [1, 2, 3] == await f
+    f = asyncio.ensure_future(q.get())
+    await asyncio.sleep(0)
+    metrics = q.metrics()
+    assert metrics is not None
+    assert 1 == metrics['getters']
+    assert 3 == metrics['peak']
+    assert 0 == metrics['depth']
+    assert 3 == metrics['dwell']['count']
+    await q.put(4)
+    assert 4 == await f
+    metrics = q.metrics()
+    assert metrics is not None
+    assert 4 == metrics['put']['count'] == metrics['get']['count']
+    assert 0 == metrics['getters']
+
+
+async def test_instrument_blocked_putters():
+    q = Queue({'instrument': True, 'maxsize': 2})
+    await q.init()
+    putters = [asyncio.ensure_future(q.put(i)) for i in range(6)]
+    await asyncio.sleep(0.1)
+    metrics = q.metrics()
+    assert metrics is not None
+    assert 2 == len(q) == metrics['depth'] == metrics['peak']
+    assert 4 == metrics['putters']
+    assert list(range(6)) == [await q.get() for _ in range(6)]
+    await asyncio.wait(putters)
+    metrics = q.metrics()
+    assert metrics is not None
+    assert 0 == metrics['depth'] == metrics['putters']
+    assert 2 == metrics['peak']
+    assert 6 == metrics['dwell']['count']
+    assert metrics['dwell']['avg'] < 0.05  # blocked time of putters is not dwell
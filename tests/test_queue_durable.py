@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from aioworkers.queue.durable import DurableQueue
+
+
+@pytest.fixture
+def config_yaml(tmp_path):
+    return f"""
+    q:
+      cls: aioworkers.queue.durable.DurableQueue
+      path: {tmp_path}
+      format: json
+    """
+
+
+async def test_put_get(context):
+    await context.q.put_many([{'a': 1}, {'a': 2}])
+    await context.q.put(3)
+    assert len(context.q) == 3
+    assert [{'a': 1}, {'a': 2}] == await context.q.get_many(2)
+    assert 3 == await context.q.get()
+    with pytest.raises(asyncio.TimeoutError):
+        await context.q.get(timeout=0.01)
+
+
+async def test_await(context, event_loop):
+    f = event_loop.create_task(context.q.get())
+    await asyncio.sleep(0)
+    await context.q.put(1)
+    assert 1 == await f
+
+
+async def recover(tmp_path, **kwargs):
+    q = DurableQueue(path=str(tmp_path), format='json', **kwargs)
+    await q.init()
+    return q
+
+
+async def test_recover(tmp_path):
+    q = await recover(tmp_path)
+    await q.put_many(range(10))
+    tag, value = await q.receive()
+    assert value == 0
+    assert 1 == await q.get()
+    tag, value = await q.receive()
+    q.nack(tag)
+    assert 2 == await q.get()
+    tag, value = await q.receive()
+    assert value == 3
+    assert q.unacked == 2
+    await q.cleanup()
+
+    q = await recover(tmp_path)
+    assert len(q) == 8
+    assert [0, 3, 4, 5, 6, 7, 8, 9] == await q.get_many(10)
+    await q.cleanup()
+
+    q = await recover(tmp_path)
+    assert not q
+    await q.cleanup()
+
+
+async def test_torn_tail(tmp_path):
+    q = await recover(tmp_path)
+    await q.put_many([1, 2])
+    await q.cleanup()
+    (log,) = tmp_path.glob('*.log')
+    with log.open('ab') as f:
+        f.write(b'\0\0\0')
+    q = await recover(tmp_path)
+    assert [1, 2] == await q.get_many(3)
+    await q.cleanup()
+
+
+async def test_segments(tmp_path):
+    q = await recover(tmp_path, segment_size=100, flush_interval=0)
+    await q.put_many(range(100))
+    await q.flush()
+    assert len(list(tmp_path.glob('*.log'))) > 5
+    await q.get_many(99)
+    await q.flush()
+    assert len(list(tmp_path.glob('*.log'))) == 1
+    await q.cleanup()
+    q = await recover(tmp_path)
+    assert [99] == await q.get_many(10)
+    await q.put(100)
+    await q.cleanup()
+    q = await recover(tmp_path)
+    assert [100] == await q.get_many(10)
+    await q.cleanup()
+    assert not list(tmp_path.glob('*.log'))
+
+
+async def test_sync(tmp_path):
+    q = await recover(tmp_path, sync=True)
+    await asyncio.gather(q.put(1), q.put(2))
+    (log,) = tmp_path.glob('*.log')
+    assert log.stat().st_size
+    await q.cleanup()
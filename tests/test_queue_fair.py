@@ -0,0 +1,91 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from aioworkers.queue.fair import WeightedFairQueue
+
+
+def tenant(value):
+    return value[0]
+
+
+@pytest.fixture
+def config_yaml():
+    return """
+    q:
+      cls: aioworkers.queue.fair.WeightedFairQueue
+      lanes:
+        a: 3
+        b: 1
+        c: 0.5
+      lane: tests.test_queue_fair.tenant
+    out:
+      cls: aioworkers.queue.base.Queue
+    worker:
+      cls: aioworkers.worker.base.Worker
+      input: .q
+      output: .out
+      batch: 8
+      run: tests.test_queue_fair.batch_run
+    """
+
+
+async def test_weights(context):
+    q: WeightedFairQueue = context.q
+    for lane in 'abc':
+        await q.put_many([lane + str(i) for i in range(100)])
+    assert 300 == len(q)
+    assert 100 == q.lane_size('b')
+    assert Counter(a=6, b=2, c=1) == Counter(v[0] for v in await q.get_many(9))
+    assert Counter(a=12, b=4, c=2) == Counter(v[0] for v in await q.get_many(18))
+    stats = q.stats()
+    assert 18 == stats['a']['got']
+    assert 82 == stats['a']['len']
+    assert stats['c']['wait_max'] >= stats['c']['wait_avg'] >= 0
+
+
+async def test_lanes(context):
+    q: WeightedFairQueue = context.q
+    await q.put('x', lane='d')
+    await q.put('a1')
+    await q.put('a2')
+    assert ['x', 'a1', 'a2'] == [await q.get() for _ in range(3)]
+    assert 1 == q.stats()['d']['weight']
+    with pytest.raises(ValueError):
+        q.set_weight('d', 0)
+    with pytest.raises(asyncio.TimeoutError):
+        await q.get(timeout=0.01)
+
+
+async def test_await(context, event_loop):
+    q: WeightedFairQueue = context.q
+    f = event_loop.create_task(q.get())
+    await asyncio.sleep(0)
+    await q.put('b1')
+    assert 'b1' == await f
+    assert q.empty()
+
+
+async def test_maxsize():
+    q = WeightedFairQueue({'maxsize': 2})
+    await q.init()
+    await q.put(1)
+    await q.put(2)
+    assert 1.0 == q.pressure
+    f = asyncio.ensure_future(q.put(3))
+    await asyncio.sleep(0)
+    assert not f.done()
+    assert 1 == await q.get()
+    await f
+    assert [2, 3] == await q.get_many(3)
+
+
+async def batch_run(worker, values):
+    return values
+
+
+async def test_worker(context):
+    await context.q.put_many(['a1', 'a2', 'b1'])
+    await context.worker.start()
+    assert {'a1', 'a2', 'b1'} == {await context.out.get() for _ in range(3)}
@@ -1,7 +1,10 @@
+import asyncio
 import io
 import os
 from queue import Queue
 
+import pytest
+
 from aioworkers import utils
 from aioworkers.core.config import Config
 from aioworkers.core.context import Context
@@ -36,3 +39,115 @@ async def test_plq(event_loop):
         assert '123' == await ctx.q.get()
         await ctx.q.put('1')
         assert b'1' + nl == fout.getvalue()
+
+
+async def test_q_many(event_loop):
+    conf = Config()
+    conf.update({'q.cls': utils.import_uri(proxy.ProxyQueue)})
+
+    async with Context(conf, loop=event_loop) as ctx:
+        ctx.q.set_queue(Queue())
+        await ctx.q.put_many([1, 2, 3])
+        assert [1, 2] == await ctx.q.get_many(2)
+        assert [3] == await ctx.q.get_many(2)
+
+
+async def test_q_prefetch(event_loop, mocker):
+    conf = Config()
+    conf.update({'q.cls': utils.import_uri(proxy.ProxyQueue), 'q.prefetch': 10})
+
+    async with Context(conf, loop=event_loop) as ctx:
+        spy = mocker.spy(ctx.q, 'run_in_executor')
+        q: Queue = Queue()
+        ctx.q.set_queue(q)
+        for i in range(100):
+            await ctx.q.put(i)
+        await ctx.q.put_many(range(100, 200))
+        assert list(range(200)) == [await ctx.q.get() for _ in range(200)]
+        spy.assert_not_called()
+        q.put_nowait(1)
+        assert [1] == await ctx.q.get_many(2, timeout=1)
+    assert q.empty()
+
+
+async def test_plq_pipe(event_loop):
+    conf = Config()
+    conf.update(
+        {
+            'q.cls': utils.import_uri(proxy.PipeLineQueue),
+            'q.format': 'newline:str',
+            'q.chunk_size': 16,
+            'q.flush_size': '1K',
+            'q.flush_interval': 0.01,
+        }
+    )
+
+    async with Context(conf, loop=event_loop) as ctx:
+        r, w = os.pipe()
+        with os.fdopen(w, 'wb') as f:
+            f.write(b''.join(b'%d\n' % i for i in range(100)) + b'tail')
+        fout = io.BytesIO()
+        ctx.q.set_reader(os.fdopen(r, 'rb'))
+        ctx.q.set_writer(fout)
+        lines = [await ctx.q.get() for _ in range(101)]
+        assert [str(i) for i in range(100)] + ['tail'] == lines
+        assert await ctx.q.get() is None
+        await ctx.q.put('1')
+        await ctx.q.put_many(['2', '3'])
+        assert not fout.getvalue()
+        await asyncio.sleep(0.05)
+        assert '1\n2\n3\n'.replace('\n', os.linesep).encode() == fout.getvalue()
+        await ctx.q.put('4')
+    assert fout.getvalue().endswith(b'4' + os.linesep.encode())
+
+
+async def test_plq_pipe_reader_kept(event_loop):
+    conf = Config()
+    conf.update({'q.cls': utils.import_uri(proxy.PipeLineQueue), 'q.format': 'newline:str'})
+
+    r, w = os.pipe()
+    reader = os.fdopen(r, 'rb')
+    async with Context(conf, loop=event_loop) as ctx:
+        ctx.q.set_reader(reader)
+        os.write(w, b'1\n')
+        assert '1' == await ctx.q.get()
+    await asyncio.sleep(0)
+    assert not reader.closed
+    assert os.get_blocking(r)
+    os.write(w, b'2\n')
+    os.close(w)
+    assert b'2\n' == reader.read()
+    reader.close()
+
+
+async def test_q_prefetch_cleanup(event_loop):
+    conf = Config()
+    conf.update({'q.cls': utils.import_uri(proxy.ProxyQueue), 'q.prefetch': 100})
+
+    q: Queue = Queue()
+    for i in range(10):
+        q.put_nowait(i)
+    async with Context(conf, loop=event_loop) as ctx:
+        ctx.q.set_queue(q)
+        assert 0 == await ctx.q.get()
+        while q.qsize():
+            await asyncio.sleep(0.01)
+    assert list(range(1, 10)) == sorted(q.get_nowait() for _ in range(q.qsize()))
+
+
+@pytest.mark.timeout(5)
+async def test_q_prefetch_full(event_loop):
+    conf = Config()
+    conf.update(
+        {
+            'q.cls': utils.import_uri(proxy.ProxyQueue),
+            'q.prefetch': 10,
+            'q.close_timeout': 0.1,
+        }
+    )
+
+    q: Queue = Queue(maxsize=1)
+    async with Context(conf, loop=event_loop) as ctx:
+        ctx.q.set_queue(q)
+        await ctx.q.put_many([1, 2, 3])
+    assert q.full()
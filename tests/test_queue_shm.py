@@ -0,0 +1,108 @@
+import asyncio
+import fcntl
+import multiprocessing
+import os
+import uuid
+
+import pytest
+
+from aioworkers.queue.shm import SharedMemoryQueue
+
+
+@pytest.fixture
+def buffer():
+    return 'aioworkers-test-' + uuid.uuid4().hex[:8]
+
+
+@pytest.fixture
+def config_yaml(buffer):
+    return f"""
+    producer:
+      cls: aioworkers.queue.shm.SharedMemoryQueue
+      buffer: {buffer}
+      size: 4K
+    consumer:
+      cls: aioworkers.queue.shm.SharedMemoryQueue
+      buffer: {buffer}
+      unlink: true
+    """
+
+
+async def test_put_get(context):
+    await context.producer.put(b'123')
+    await context.producer.put({'a': 1})
+    assert len(context.consumer) == 2
+    assert b'123' == await context.consumer.get()
+    assert {'a': 1} == await context.consumer.get()
+    assert context.consumer.empty()
+    with pytest.raises(asyncio.TimeoutError):
+        await context.consumer.get(timeout=0.01)
+    for i in range(1000):
+        await context.producer.put(bytes(i % 200))
+        assert bytes(i % 200) == await context.consumer.get()
+    with pytest.raises(ValueError):
+        await context.producer.put(bytes(5000))
+
+
+async def test_full(context, event_loop):
+    value = bytes(1000)
+    for _ in range(4):
+        await context.producer.put(value)
+    f = event_loop.create_task(context.producer.put(value))
+    await asyncio.sleep(0.01)
+    assert not f.done()
+    assert value == await context.consumer.get()
+    await f
+    assert len(context.consumer) == 4
+
+
+def produce(buffer, count):
+    async def main():
+        q = SharedMemoryQueue(buffer=buffer, loop=asyncio.get_running_loop())
+        await q.init()
+        await asyncio.sleep(0.1)
+        for i in range(count):
+            await q.put(i)
+        await q.cleanup()
+
+    asyncio.run(main())
+
+
+@pytest.mark.timeout(5)
+async def test_processes(context, buffer):
+    p = multiprocessing.get_context('fork').Process(target=produce, args=(buffer, 100))
+    p.start()
+    result = [await context.consumer.get() for _ in range(100)]
+    p.join()
+    assert result == list(range(100))
+
+
+@pytest.mark.timeout(5)
+async def test_lock_contention(context, event_loop, buffer):
+    await context.producer.put(b'1')
+    path = context.consumer._dir / f'{buffer}.get.lock'
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        f = event_loop.create_task(context.consumer.get())
+        await asyncio.sleep(0.05)  # loop is not blocked by lock
+        assert not f.done()
+    finally:
+        os.close(fd)
+    assert b'1' == await f
+
+
+@pytest.mark.timeout(5)
+async def test_producer_closed(context, event_loop, mocker):
+    await context.producer.put(b'1')
+    assert b'1' == await context.consumer.get()
+    f = event_loop.create_task(context.consumer.get(timeout=1))
+    await asyncio.sleep(0.01)
+    await context.producer.put(b'2')
+    assert b'2' == await f
+    os.close(context.producer._writer_fd)  # as on exit of producer
+    context.producer._writer_fd = None
+    spy = mocker.spy(context.consumer, '_wait')
+    with pytest.raises(asyncio.TimeoutError):
+        await context.consumer.get(timeout=0.3)
+    assert spy.call_count < 10
@@ -1,9 +1,10 @@
 import asyncio
+import random
 import time
 
 import pytest
 
-from aioworkers.queue.timeout import TimestampQueue, UniqueQueue
+from aioworkers.queue.timeout import IndexedHeapBackend, Item, TimestampQueue, UniqueQueue
 
 
 @pytest.fixture
@@ -125,14 +126,16 @@ async def test_maxsize(context, event_loop):
     for i in range(4):
         await context.q.put(i)
     assert not context.q.full()
-    f = event_loop.create_task(context.q.put(5))
-    await asyncio.sleep(0.1)
+    await context.q.put(5)
     assert context.q.full()
-    assert len(context.q) >= 5
+    f = event_loop.create_task(context.q.put(6))
+    await asyncio.sleep(0.1)
+    assert len(context.q) == 5
     assert not f.done()
     assert 0 == await context.q.get()
     await asyncio.sleep(0.1)
     assert f.done()
+    assert len(context.q) == 5
 
 
 @pytest.mark.timeout(2)
@@ -225,3 +228,219 @@ async def test_cleanup(event_loop):
         assert q._putters
     assert not q._getters
     assert not q._putters
+
+
+@pytest.mark.timeout(1)
+async def test_many_batch():
+    async with TimestampQueue() as q:
+        t = time.time()
+        await q.put_many([3, 4], t - 1)
+        await q.put_many([1, 2], t - 2)
+        await q.put(5, t + 10)
+        assert [1, 2] == sorted(await q.get_many(2))
+        assert [(3, t - 1), (4, t - 1)] == sorted(await q.get_many(3, score=True))
+        with pytest.raises(asyncio.TimeoutError):
+            await q.get_many(3, timeout=0.1)
+        assert len(q) == 1
+
+
+@pytest.mark.timeout(1)
+async def test_many_batch_await(event_loop):
+    async with UniqueQueue() as q:
+        f = event_loop.create_task(q.get_many(5))
+        await asyncio.sleep(0)
+        await q.put_many([1, 2, 1])
+        assert [1, 2] == sorted(await f)
+        assert not q
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('backend', ['heap', 'wheel'])
+async def test_backend(backend):
+    async with TimestampQueue(backend=backend, resolution=0.05) as q:
+        t = time.time()
+        await q.put(2, t + 0.2)
+        await q.put(3, t + 0.3)
+        await q.put(1, t + 0.1)
+        await q.put(0, t - 1)
+        assert len(q) == 4
+        assert 0 == await q.get()
+        assert (1, t + 0.1) == await q.get(score=True)
+        assert 2 == await q.get()
+        assert 3 == await q.get()
+        assert time.time() >= t + 0.3
+        assert not q
+
+
+@pytest.mark.timeout(1)
+async def test_wheel_unique():
+    async with UniqueQueue(backend='wheel', resolution=0.05) as q:
+        t = time.time()
+        for i in range(100):
+            await q.put(i % 10, t + 0.1 + i / 1000)
+        assert len(q) == 10
+        c = []
+        while q:
+            c.extend(await q.get_many(20))
+        assert list(range(10)) == sorted(c)
+
+
+@pytest.mark.timeout(1)
+async def test_wheel_one_timer(event_loop):
+    async with TimestampQueue(backend='wheel', resolution=0.1) as q:
+        f = event_loop.create_task(q.get())
+        await asyncio.sleep(0)
+        t = time.time()
+        await q.put(0, t + 0.01)
+        timer = q._timer
+        assert timer is not None
+        for i in range(1, 100):
+            await q.put(i, t + 0.01 + i / 1000)
+        assert q._timer is timer
+        assert 0 == await f
+
+
+async def test_backend_config():
+    q = TimestampQueue({'backend': 'wheel', 'resolution': '1s', 'name': 'q'})
+    assert q._resolution == 1
+    assert len(q) == 0
+    with pytest.raises(ValueError):
+        TimestampQueue({'backend': 'unknown', 'name': 'q'})
+
+
+@pytest.mark.timeout(1)
+@pytest.mark.parametrize('backend', ['heap', 'wheel'])
+async def test_unique_index(backend):
+    async with UniqueQueue(backend=backend) as q:
+        t = time.time()
+        for i in range(1000):
+            await q.put(i % 10, t + 10 - i / 1000)
+        assert len(q) == 10
+        assert 3 in q
+        assert 11 not in q
+        assert q.remove(3)
+        assert not q.remove(3)
+        assert 3 not in q
+        q.reschedule(5, t - 1)
+        with pytest.raises(KeyError):
+            q.reschedule(3, t)
+        assert (5, t - 1) == await q.get(score=True)
+        with pytest.raises(asyncio.TimeoutError):
+            await q.get(timeout=0.01)
+        for i in range(10):
+            if i in q:
+                q.reschedule(i, t - i)
+        assert [9, 8, 7, 6, 4, 2, 1, 0] == await q.get_many(10)
+        assert not q
+
+
+@pytest.mark.timeout(1)
+async def test_unique_reschedule_wakeup(event_loop):
+    async with UniqueQueue() as q:
+        await q.put(1, time.time() + 10)
+        f = event_loop.create_task(q.get())
+        await asyncio.sleep(0.01)
+        assert not f.done()
+        q.reschedule(1, time.time())
+        assert 1 == await f
+        assert not q
+
+
+def test_indexed_heap():
+    b = IndexedHeapBackend()
+    values = list(range(200))
+    random.shuffle(values)
+    for v in values:
+        b.push(Item(timestamp=v, seq=v, value=v % 50))
+    assert len(b) == 50
+    for v in range(0, 50, 3):
+        b.remove(v)
+    result = []
+    while b:
+        item = b.pop(float('inf'))
+        assert item is not None
+        result.append(item.timestamp)
+    assert len(result) == 33
+    assert result == sorted(result)
+    assert not b._index
+
+
+@pytest.mark.parametrize('size', [0, 100])
+def test_indexed_heap_extend(size):
+    b = IndexedHeapBackend()
+    for v in range(size):
+        b.push(Item(timestamp=v, seq=v, value=v))
+    values = list(range(200))
+    random.shuffle(values)
+    b.extend([Item(timestamp=-v, seq=v, value=v % 150) for v in values])
+    assert len(b) == 150
+    result = []
+    while b:
+        item = b.pop(float('inf'))
+        assert item is not None
+        assert b._index.get(item.value) is None
+        result.append(item)
+    assert [i.timestamp for i in result] == sorted(i.timestamp for i in result)
+    # last pushed item of value wins
+    assert {i.value: i.timestamp for i in result} == {v % 150: -v for v in values}
+
+
+@pytest.mark.timeout(1)
+async def test_fifo_same_score():
+    async with TimestampQueue() as q:
+        values = [{'a': 1}, {'a': 2}, {'a': 3}]
+        await q.put_many(values[:2], 1)
+        await q.put(values[2], 1)
+        assert values == await q.get_many(3)
+
+
+async def test_watermarks(event_loop):
+    q = TimestampQueue(maxsize=3, low=1)
+    await q.init()
+    await q.put_many([1, 2])
+    putters = [event_loop.create_task(q.put(i)) for i in range(3, 7)]
+    await asyncio.sleep(0)
+    assert [True, False, False, False] == [f.done() for f in putters]
+    putters[1].cancel()
+    assert 1.0 == q.pressure
+    assert 1 == await q.get()
+    await asyncio.sleep(0)
+    assert q.full()
+    assert [True, True, False, False] == [f.done() for f in putters]
+    assert 2 == await q.get()
+    await asyncio.sleep(0)
+    assert all(f.done() for f in putters)
+    assert [3, 5, 6] == await q.get_many(3)
+    assert 0 == q.pressure
+    await q.cleanup()
+
+
+async def test_putter_wakeup(event_loop):
+    q = TimestampQueue(maxsize=2)
+    await q.init()
+    putters = [event_loop.create_task(q.put(v)) for v in 'abcd']
+    await asyncio.sleep(0)
+    assert [True, True, False, False] == [f.done() for f in putters]
+    assert 'a' == await q.get()
+    await asyncio.sleep(0)
+    assert [True, True, True, False] == [f.done() for f in putters]
+    assert 2 == len(q)
+    assert ['b', 'c'] == [await q.get(), await q.get()]
+    await asyncio.sleep(0)
+    assert 0.5 == q.pressure
+    assert all(f.done() for f in putters)
+    await q.cleanup()
+
+
+@pytest.mark.timeout(1)
+async def test_put_many_maxsize(event_loop):
+    q = TimestampQueue(maxsize=2)
+    await q.init()
+    f = event_loop.create_task(q.put_many('abc'))
+    await asyncio.sleep(0)
+    assert 2 == len(q)
+    assert not f.done()
+    assert 'a' == await q.get()
+    await f
+    assert ['b', 'c'] == await q.get_many(2)
+    await q.cleanup()
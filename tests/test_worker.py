@@ -83,3 +83,225 @@ async def test_set_context(event_loop):
     worker.set_context(context)
     with pytest.raises(RuntimeError):
         worker.set_context(context)
+
+
+async def batch_run(worker, values):
+    return [v * 2 for v in values]
+
+
+async def test_batch(event_loop):
+    config = Config(
+        w=dict(
+            cls='aioworkers.worker.base.Worker',
+            run='tests.test_worker.batch_run',
+            input='.q1',
+            output='.q2',
+            batch=10,
+        ),
+        q1=dict(cls='aioworkers.queue.base.Queue', instrument=True),
+        q2=dict(cls='aioworkers.queue.base.Queue'),
+    )
+    async with Context(config, loop=event_loop) as context:
+        await context.q1.put_many([1, 2, 3])
+        await context.w.start()
+        assert [2, 4, 6] == [await context.q2.get() for _ in range(3)]
+        status = await context.w.status()
+        assert 3 == status['input']['dwell']['count']
+        assert 1 == status['input']['getters']
+        assert 'output' not in status
+        assert 1 == status['timing']['run']['count']
+        assert 1 == status['timing']['put']['count']
+        assert 1 == status['rate']['done']['count']
+        assert status['timing']['get']['p99'] >= 0
+        await context.w.stop()
+        assert context.w.counter['run'] == 1
+
+
+async def eof_run(worker, value):
+    if value is None:
+        raise EOFError('connection closed')
+    return value
+
+
+async def test_run_eof(event_loop):
+    config = Config(
+        w=dict(
+            cls='aioworkers.worker.base.Worker',
+            run='tests.test_worker.eof_run',
+            input='.q1',
+            output='.q2',
+        ),
+        q1=dict(cls='aioworkers.queue.base.Queue'),
+        q2=dict(cls='aioworkers.queue.base.Queue'),
+    )
+    async with Context(config, loop=event_loop) as context:
+        await context.q1.put_many([None, 1, 2])
+        await context.w.start()
+        assert [1, 2] == [await asyncio.wait_for(context.q2.get(), 1) for _ in range(2)]
+        assert context.w.running()
+        assert context.w.counter['error'] == 1
+        await context.w.stop()
+
+
+async def sleep_run(worker, value):
+    await asyncio.sleep(value)
+    return value
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+async def test_concurrency(event_loop, ordered):
+    config = Config(
+        w=dict(
+            cls='aioworkers.worker.base.Worker',
+            run='tests.test_worker.sleep_run',
+            input='.q1',
+            output='.q2',
+            concurrency=3,
+            ordered=ordered,
+        ),
+        q1=dict(cls='aioworkers.queue.base.Queue'),
+        q2=dict(cls='aioworkers.queue.base.Queue'),
+    )
+    async with Context(config, loop=event_loop) as context:
+        await context.q1.put_many([0.3, 0.1, 0.2, 0.5])
+        await context.w.start()
+        await asyncio.sleep(0.05)
+        assert (await context.w.status())['in_flight'] == 3
+        await context.w.stop(force=False)
+        assert not context.w.running()
+        result = [context.q2.get_nowait() for _ in range(context.q2.qsize())]
+        if ordered:
+            assert result == [0.3, 0.1, 0.2]
+        else:
+            assert result == [0.1, 0.2, 0.3]
+        assert context.w.counter['done'] == 3
+        assert len(context.q1) == 1
+
+
+async def test_concurrency_force(event_loop):
+    config = Config(
+        w=dict(
+            cls='aioworkers.worker.base.Worker',
+            run='tests.test_worker.sleep_run',
+            input='.q1',
+            concurrency=2,
+        ),
+        q1=dict(cls='aioworkers.queue.base.Queue'),
+    )
+    async with Context(config, loop=event_loop) as context:
+        await context.q1.put_many([10, 10])
+        await context.w.start()
+        await asyncio.sleep(0.05)
+        await context.w.stop()
+        assert not (await context.w.status())['in_flight']
+        assert not context.w.counter['done']
+
+
+async def test_retry(event_loop, mocker):
+    calls = []
+
+    async def run(worker, value):
+        calls.append(value)
+        if value == 'bad' or calls.count(value) < 3:
+            raise ValueError(value)
+        return value
+
+    mocker.patch('aioworkers.worker.base.import_name', lambda x: run)
+    config = Config(
+        q=dict(cls='aioworkers.queue.timeout.TimestampQueue'),
+        out=dict(cls='aioworkers.queue.base.Queue'),
+        dead=dict(cls='aioworkers.queue.base.Queue'),
+        w=dict(
+            cls='aioworkers.worker.base.Worker',
+            run='mocked.run',
+            autorun=True,
+            input='.q',
+            output='.out',
+            dead_letter='.dead',
+            retries=2,
+            retry_delay=0.01,
+        ),
+    )
+    async with Context(config, loop=event_loop) as context:
+        await context.q.put('good')
+        await context.q.put('bad')
+        assert 'good' == await asyncio.wait_for(context.out.get(), 1)
+        failed = await asyncio.wait_for(context.dead.get(), 1)
+        assert failed.value == 'bad'
+        assert failed.attempt == 3
+        assert 'ValueError' in failed.error
+        assert calls.count('bad') == 3
+        assert context.w.counter['retry'] == 4
+        assert context.w.counter['dead'] == 1
+
+
+async def test_retry_queue_without_score(event_loop):
+    config = Config(
+        q=dict(cls='aioworkers.queue.base.Queue'),
+        w=dict(cls='aioworkers.worker.base.Worker', input='.q', retries=2),
+    )
+    with pytest.raises(TypeError):
+        async with Context(config, loop=event_loop):
+            pass
+
+
+@pytest.mark.parametrize('concurrency', [1, 3])
+async def test_drain(event_loop, mocker, concurrency):
+    done = []
+
+    async def run(worker, value):
+        if value:
+            await asyncio.sleep(10)
+        done.append(value)
+
+    mocker.patch('aioworkers.worker.base.import_name', lambda x: run)
+    config = Config(
+        q=dict(cls='aioworkers.queue.base.Queue'),
+        w=dict(
+            cls='aioworkers.worker.base.Worker',
+            run='mocked.run',
+            autorun=True,
+            input='.q',
+            concurrency=concurrency,
+            drain=0.05,
+        ),
+    )
+    async with Context(config, loop=event_loop) as context:
+        await context.q.put_many([0, 1, 2, 3, 4])
+        await asyncio.sleep(0.01)
+        await context.stop()
+        assert not context.w.running()
+        assert done == [0]
+        assert sorted(context.q._queue) == [1, 2, 3, 4]
+        assert context.w.counter['handoff'] == concurrency
+
+
+@pytest.mark.parametrize('from_config', [True, False])
+async def test_drain_order(event_loop, mocker, from_config):
+    from aioworkers.core.context import GroupResolver
+
+    drained = []
+
+    async def drain(self, timeout=None):
+        drained.append(self.name)
+
+    mocker.patch.object(Worker, 'drain', drain)
+    config = Config(
+        a=dict(cls='aioworkers.worker.base.Worker', groups=['a'], drain=1),
+        b=dict(cls='aioworkers.worker.base.Worker', groups=['b'], drain=1),
+        c=dict(cls='aioworkers.worker.base.Worker', drain=1),
+    )
+    kwargs = {}
+    if from_config:
+        config.update(drain_order=['b', 'a'])
+    else:
+        kwargs['drain_order'] = ['b', 'a']
+    async with Context(
+        config,
+        loop=event_loop,
+        group_resolver=GroupResolver(all_groups=True),
+        **kwargs,
+    ):
+        assert not drained
+    # context exit stops workers with drain
+    assert drained == ['b', 'a', 'c']
@@ -0,0 +1,99 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import signal
+import time
+
+import pytest
+
+from aioworkers.core.config import Config
+from aioworkers.core.context import Context
+from aioworkers.worker.process import recv, send
+
+
+def square(value):
+    if value == 'crash':
+        os._exit(1)
+    elif value == 'sleep':
+        time.sleep(10)
+    elif value == 'busy':
+        time.sleep(0.5)
+        return 3
+    elif value == 'error':
+        raise ValueError(value)
+    return value * value
+
+
+async def pid(value):
+    await asyncio.sleep(0.01)
+    return os.getpid()
+
+
+def config(target='tests.test_worker_process.square', start_method='fork', **kwargs):
+    return Config(
+        w=dict(
+            cls='aioworkers.worker.process.ProcessSupervisor',
+            target=target,
+            processes=2,
+            start_method=start_method,
+            **kwargs,
+        ),
+        q1=dict(cls='aioworkers.queue.base.Queue'),
+        q2=dict(cls='aioworkers.queue.base.Queue'),
+    )
+
+
+@pytest.mark.timeout(10)
+async def test_queue():
+    async with Context(config(input='.q1', output='.q2', autorun=True)) as ctx:
+        await ctx.q1.put_many(range(10))
+        assert [i * i for i in range(10)] == sorted([await ctx.q2.get() for _ in range(10)])
+        status = await ctx.w.status()
+        assert 2 == len(status['processes'])
+
+
+@pytest.mark.timeout(10)
+async def test_restart():
+    async with Context(config(timeout=0.5)) as ctx:
+        with pytest.raises(ValueError):
+            await ctx.w.run('error')
+        pids = {h.process.pid for h in ctx.w._processes.values()}
+        with pytest.raises(RuntimeError):
+            await ctx.w.run('crash')
+        with pytest.raises(asyncio.TimeoutError):
+            await ctx.w.run('sleep')
+        assert 4 == await ctx.w.run(2)
+        status = await ctx.w.status()
+        assert 2 == status['restarts']
+        assert all(p['alive'] for p in status['processes'].values())
+        assert pids != {h.process.pid for h in ctx.w._processes.values()}
+
+
+@pytest.mark.timeout(20)
+async def test_spawn():
+    async with Context(config('tests.test_worker_process.pid', start_method='spawn')) as ctx:
+        pids = await asyncio.gather(*(ctx.w.run(i) for i in range(4)))
+        assert os.getpid() not in pids
+        assert 2 == len(set(pids))
+
+
+def test_out_of_band():
+    a, b = multiprocessing.Pipe()
+    send(a, 1, True, {'data': pickle.PickleBuffer(bytearray(b'x' * 100))})
+    tag, ok, value = recv(b)
+    assert (1, True) == (tag, ok)
+    assert b'x' * 100 == bytes(value['data'])
+
+
+@pytest.mark.timeout(10)
+async def test_ping():
+    async with Context(config(ping=0.05, ping_timeout=0.1)) as ctx:
+        assert 3 == await ctx.w.run('busy')
+        assert not ctx.w._restarts
+        handle = ctx.w._processes['process0']
+        os.kill(handle.process.pid, signal.SIGSTOP)
+        while not ctx.w._restarts:
+            await asyncio.sleep(0.05)
+        assert handle.process.pid != ctx.w._processes['process0'].process.pid
+        assert 4 == await ctx.w.run(2)
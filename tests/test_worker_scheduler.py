@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from aioworkers.core.config import Config
+from aioworkers.core.context import Context
+from aioworkers.worker.scheduler import Subscription
+
+
+@pytest.mark.parametrize(
+    'policy,pending,skipped',
+    [('skip', 0, 3), ('coalesce', 1, 2), ('all', 3, 0)],
+)
+async def test_policy(event_loop, policy, pending, skipped):
+    config = Config(s=dict(cls='aioworkers.worker.scheduler.Scheduler'))
+    async with Context(config, loop=event_loop) as context:
+        sub = context.s.subscribe('w', '* * * * *', policy=policy)
+        for _ in range(3):
+            sub.tick(sub.due)
+        assert sub.pending == pending
+        assert sub.skipped == skipped
+        assert sub.misfired == 3
+        for _ in range(pending):
+            await sub.wait()
+        assert sub.fired == pending
+        with pytest.raises(ValueError):
+            context.s.subscribe('w', '* * * * *', policy='unknown')
+
+
+async def test_worker(event_loop, mocker):
+    mocker.patch.object(Subscription, 'next_due', lambda self, after: after + 0.02)
+    counter = []
+
+    async def run(worker):
+        counter.append(1)
+        if len(counter) == 2:
+            await asyncio.sleep(0.1)
+
+    mocker.patch('aioworkers.worker.base.import_name', lambda x: run)
+    config = Config(
+        s=dict(cls='aioworkers.worker.scheduler.Scheduler', policy='coalesce'),
+        w=dict(
+            cls='aioworkers.worker.base.Worker',
+            run='mocked.run',
+            autorun=True,
+            crontab='* * * * *',
+            scheduler='.s',
+        ),
+        sleeper=dict(
+            cls='aioworkers.worker.base.Worker',
+            autorun=True,
+            persist=True,
+            sleep=0.01,
+            scheduler='.s',
+        ),
+    )
+    async with Context(config, loop=event_loop) as context:
+        await asyncio.sleep(0.3)
+        status = await context.w.status()
+        assert status['schedule']['fired'] == len(counter) > 3
+        assert status['schedule']['misfired'] >= 1
+        assert status['schedule']['skipped'] >= 1
+        assert 'w' in context.s.stats()
+        await context.w.stop()
+        assert 'w' not in context.s.stats()
+        assert context.sleeper.counter['error'] > 1
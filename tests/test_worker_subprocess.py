@@ -1,3 +1,5 @@
+import asyncio
+import os
 from asyncio import subprocess
 
 import pytest
@@ -129,3 +131,151 @@ async def test_kwarg(event_loop, arg):
         ),
     ) as ctx:
         assert b"1\n" == await ctx.a.run_cmd(**arg)
+
+
+ECHO = """
+import sys
+for line in sys.stdin:
+    if line.startswith("crash"):
+        sys.exit(1)
+    sys.stdout.write(line.upper())
+    sys.stdout.flush()
+"""
+
+
+async def test_pool(event_loop):
+    config = Config(
+        a=dict(
+            cls="aioworkers.worker.subprocess.Subprocess",
+            cmd=["{python}", "-c", ECHO],
+            format="str",
+            pool=2,
+        )
+    )
+    async with Context(config, loop=event_loop) as ctx:
+        results = await asyncio.gather(*(ctx.a.run(f"x{i}") for i in range(10)))
+        assert results == [f"X{i}" for i in range(10)]
+        status = await ctx.a.status()
+        pids = status["pool"]["pids"]
+        assert len(pids) == 2
+        with pytest.raises(RuntimeError):
+            await ctx.a.run("crash")
+        assert "Y" == await ctx.a.run("y")
+        status = await ctx.a.status()
+        assert status["pool"]["respawns"] == 1
+        assert len(status["pool"]["pids"]) == 2
+        assert set(pids) != set(status["pool"]["pids"])
+
+
+async def test_pool_idle_death(event_loop):
+    config = Config(
+        a=dict(
+            cls="aioworkers.worker.subprocess.Subprocess",
+            cmd=["{python}", "-c", ECHO],
+            format="str",
+            pool=1,
+        )
+    )
+    async with Context(config, loop=event_loop) as ctx:
+        assert "X" == await ctx.a.run("x")
+        process = ctx.a._pool[0]
+        process.kill()
+        await process.wait()
+        assert "Y" == await asyncio.wait_for(ctx.a.run("y"), 5)
+        status = await ctx.a.status()
+        assert status["pool"]["respawns"] == 1
+        assert process.pid not in status["pool"]["pids"]
+        process = ctx.a._pool[0]
+        with pytest.raises(ValueError):
+            await ctx.a.run("a\nb")
+        await asyncio.sleep(0.1)
+        assert [process] == ctx.a._pool
+
+
+SIZE_ECHO = """
+import struct, sys
+while True:
+    header = sys.stdin.buffer.read(4)
+    if not header:
+        break
+    data = sys.stdin.buffer.read(struct.unpack("!I", header)[0])
+    sys.stdout.buffer.write(header + data)
+    sys.stdout.buffer.flush()
+"""
+
+
+async def test_pool_size_frame(event_loop):
+    config = Config(
+        a=dict(
+            cls="aioworkers.worker.subprocess.Subprocess",
+            cmd=["{python}", "-c", SIZE_ECHO],
+            format="json",
+            frame="size",
+            pool=1,
+        )
+    )
+    async with Context(config, loop=event_loop) as ctx:
+        assert {"a": "1\n2"} == await ctx.a.run({"a": "1\n2"})
+        assert [1, 2] == await ctx.a.run([1, 2])
+
+
+LINES = """
+import sys
+for i in range(100):
+    sys.stdout.write(str(i) + "\\n")
+sys.stdout.write("end")
+"""
+
+
+async def test_stream(event_loop):
+    config = Config(
+        q=dict(cls="aioworkers.queue.base.Queue", maxsize=2),
+        a=dict(
+            cls="aioworkers.worker.subprocess.Subprocess",
+            cmd=["{python}", "-c", LINES],
+            format="str",
+            stream=True,
+            output="q",
+        ),
+    )
+    async with Context(config, loop=event_loop) as ctx:
+        task = event_loop.create_task(ctx.a.run_cmd())
+        await asyncio.sleep(0.5)
+        assert not task.done()
+        assert len(ctx.q) == 2
+        result = [await ctx.q.get() for _ in range(100)]
+        assert result == [str(i) for i in range(100)]
+        assert "end" == await ctx.q.get()
+        assert 101 == await task
+
+
+def test_stream_pool():
+    worker = Subprocess()
+    with pytest.raises(ValueError):
+        worker.set_config(Config(name="a", cmd="cat", pool=2, stream=True))
+
+
+@pytest.mark.parametrize("snapshot", ["stdin", "file", "memfd"])
+async def test_snapshot(event_loop, snapshot):
+    config = Config(
+        x=dict(y=5),
+        a=dict(
+            cls="aioworkers.worker.subprocess.Subprocess",
+            aioworkers=["x.y"],
+            snapshot=snapshot,
+        ),
+    )
+    async with Context(config, loop=event_loop) as ctx:
+        data = ctx.config.snapshot()
+        assert data is ctx.config.snapshot()
+        assert b"x.y => 5" in await ctx.a.run_cmd()
+        assert b"x.y => 5" in await ctx.a.run_cmd()
+        ctx.config.update({"x.y": 6})
+        assert data is not ctx.config.snapshot()
+        assert b"x.y => 6" in await ctx.a.run_cmd()
+        files = list(ctx.a._snapshot_files)
+        if snapshot == "file":
+            # file of replaced snapshot is removed
+            assert 1 == len(files)
+    for path in files:
+        assert not os.path.exists(path)
@@ -1,5 +1,8 @@
+import asyncio
 from pathlib import Path
 
+import pytest
+
 from aioworkers.core.config import Config
 from aioworkers.core.context import Context
 
@@ -36,3 +39,84 @@ async def test_super_crash(event_loop):
         ctx.sv['a']._future.cancel()
         await ctx.q1.put(1)
         await ctx.q2.get()
+
+
+async def sleep_run(w, value):
+    await asyncio.sleep(0.01)
+    return value
+
+
+@pytest.mark.timeout(5)
+async def test_autoscale(event_loop):
+    async with Context(config.super.autoscale, loop=event_loop) as ctx:
+        assert 1 == len(ctx.sv._children)
+        signals = len(ctx.on_stop._signals)
+        await ctx.q1.put_many(range(100))
+        await asyncio.sleep(0.1)
+        status = await ctx.sv.status()
+        assert 4 == len(status['children'])
+        assert 4 == status['autoscale']['max']
+        assert sorted(range(100)) == sorted([await ctx.q2.get() for _ in range(100)])
+        while len(ctx.sv._children) > 1:
+            await asyncio.sleep(0.02)
+        assert ctx.q1.empty()
+        assert signals == len(ctx.on_stop._signals)
+
+
+def dispatch_config(dispatch, **kwargs):
+    return Config(
+        sv=dict(
+            cls='aioworkers.worker.supervisor.Supervisor',
+            children=4,
+            dispatch=dispatch,
+            child=dict(
+                cls='aioworkers.worker.base.Worker',
+                run='tests.test_worker_supervisor.sleep_run',
+            ),
+            **kwargs,
+        ),
+    )
+
+
+async def test_dispatch_round_robin(event_loop):
+    async with Context(dispatch_config('round_robin'), loop=event_loop) as ctx:
+        for i in range(8):
+            assert i == await ctx.sv(i)
+        status = await ctx.sv.status()
+        assert {2} == set(status['dispatch']['calls'].values())
+
+
+async def test_dispatch_least(event_loop):
+    async with Context(dispatch_config('least'), loop=event_loop) as ctx:
+        await asyncio.gather(*(ctx.sv(i) for i in range(40)))
+        calls = (await ctx.sv.status())['dispatch']['calls']
+        assert 40 == sum(calls.values())
+        ctx.sv._in_flight['child0'] = 100
+        assert 'child0' not in {ctx.sv._dispatcher.choose((), {}) for _ in range(100)}
+        ctx.sv._in_flight['child0'] = 0
+
+
+async def test_dispatch_hash(event_loop):
+    async with Context(dispatch_config('hash', replicas=10), loop=event_loop) as ctx:
+        dispatcher = ctx.sv._dispatcher
+        names = {dispatcher.choose((i,), {}) for i in range(100)}
+        assert 4 == len(names)
+        assert dispatcher.choose(('key',), {}) == dispatcher.choose(('key',), {})
+        before = {i: dispatcher.choose((i,), {}) for i in range(100)}
+        dispatcher.update(['child0', 'child1', 'child2'])
+        moved = [i for i in range(100) if before[i] != 'child3' and before[i] != dispatcher.choose((i,), {})]
+        assert not moved
+        assert 'x' == await ctx.sv('x')
+
+
+async def slow_run(w, value):
+    await asyncio.sleep(value)
+
+
+async def test_drain(event_loop):
+    async with Context(config.super.drain, loop=event_loop) as ctx:
+        await ctx.q1.put_many([10] * 5)
+        await asyncio.sleep(0.01)
+        await ctx.stop()
+        assert len(ctx.q1) == 5
+        assert not any(w.running() for w in ctx.sv._children.values())